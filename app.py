@@ -1,16 +1,26 @@
 import sys
 import os
+import multiprocessing
 
 os.environ["QT_LOGGING_RULES"] = "qt.qpa.fonts.debug=false;qt.webengine.*=false"
 
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
-
 def main():
+    # imported here, not at module level: spawned worker processes re-run this module's
+    # top level and should not pay for Qt / WebEngine / geopandas just to scan layers
+    from PySide6.QtCore import Qt, QCoreApplication
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
+    # the map (QtWebEngine) is created on demand, after the application object exists:
+    # WebEngine then needs shared GL contexts set up front, and keeping its native
+    # window from turning its sibling widgets native avoids extra window handles
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    QCoreApplication.setAttribute(Qt.AA_DontCreateNativeWidgetSiblings)
     app = QApplication(sys.argv)
     w = MainWindow()
     w.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # worker processes in the PyInstaller build
     main()
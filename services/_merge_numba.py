@@ -0,0 +1,160 @@
+# dxf2gis_gui/services/_merge_numba.py
+from __future__ import annotations
+import numpy as np
+
+# numba is optional: without it the kernels below run as plain Python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+@njit(cache=True)
+def _next_unused(node, indptr, indices, used, cursor):
+    # edges only ever become used, so the per-node scan pointer never moves back
+    j = cursor[node]
+    end = indptr[node + 1]
+    while j < end and used[indices[j]]:
+        j += 1
+    cursor[node] = j
+    if j < end:
+        return indices[j]
+    return -1
+
+
+@njit(cache=True)
+def _find(parent, x):
+    root = x
+    while parent[root] != root:
+        root = parent[root]
+    while parent[x] != root:  # path compression
+        nxt = parent[x]
+        parent[x] = root
+        x = nxt
+    return root
+
+
+@njit(cache=True)
+def _components_impl(n_nodes, edge_from, edge_to):
+    parent = np.arange(n_nodes)
+    rank = np.zeros(n_nodes, np.int64)
+    for i in range(len(edge_from)):
+        ra = _find(parent, edge_from[i])
+        rb = _find(parent, edge_to[i])
+        if ra == rb:
+            continue
+        if rank[ra] < rank[rb]:
+            ra, rb = rb, ra
+        parent[rb] = ra
+        if rank[ra] == rank[rb]:
+            rank[ra] += 1
+    labels = np.empty(n_nodes, np.int64)
+    for v in range(n_nodes):
+        labels[v] = _find(parent, v)
+    return labels
+
+
+@njit(cache=True)
+def _walk_paths_impl(indptr, indices, edge_from, edge_to, node_deg,
+                     node_order, node_grp_ptr, edge_order, edge_grp_ptr):
+    n_edges = len(edge_from)
+    used = np.zeros(n_edges, np.bool_)
+    cursor = np.empty(len(indptr) - 1, np.int64)
+    for i in range(len(indptr) - 1):
+        cursor[i] = indptr[i]
+    seq = np.empty(n_edges, np.int64)
+    rev = np.zeros(n_edges, np.bool_)
+    starts = np.empty(n_edges + 1, np.int64)
+    k = 0
+    p = 0
+
+    for g in range(len(node_grp_ptr) - 1):
+        # 1) open chains: start at every node whose degree != 2
+        for ni in range(node_grp_ptr[g], node_grp_ptr[g + 1]):
+            node = node_order[ni]
+            if node_deg[node] == 2:
+                continue
+            while True:
+                ei = _next_unused(node, indptr, indices, used, cursor)
+                if ei < 0:
+                    break
+                starts[p] = k
+                p += 1
+                cur = node
+                while True:
+                    ei = _next_unused(cur, indptr, indices, used, cursor)
+                    if ei < 0:
+                        break
+                    used[ei] = True
+                    if edge_from[ei] == cur:
+                        other = edge_to[ei]
+                        rev[k] = False
+                    else:
+                        other = edge_from[ei]
+                        rev[k] = True
+                    seq[k] = ei
+                    k += 1
+                    if node_deg[other] != 2:
+                        break
+                    cur = other
+
+        # 2) whatever is left are closed loops (all nodes degree 2)
+        for ej0 in range(edge_grp_ptr[g], edge_grp_ptr[g + 1]):
+            ei = edge_order[ej0]
+            if used[ei]:
+                continue
+            used[ei] = True
+            starts[p] = k
+            p += 1
+            seq[k] = ei
+            rev[k] = False
+            k += 1
+            cur = edge_to[ei]
+            while True:
+                ej = _next_unused(cur, indptr, indices, used, cursor)
+                if ej < 0:
+                    break
+                used[ej] = True
+                if edge_from[ej] == cur:
+                    cur = edge_to[ej]
+                    rev[k] = False
+                else:
+                    cur = edge_from[ej]
+                    rev[k] = True
+                seq[k] = ej
+                k += 1
+                if node_deg[cur] != 2:
+                    break
+
+    starts[p] = k
+    return seq, rev, starts[:p + 1]
+
+
+def connected_components(n_nodes, edge_from, edge_to) -> np.ndarray:
+    """Union-find over edge endpoints; returns the root node id for every node."""
+    if NUMBA_AVAILABLE:
+        return _components_impl(n_nodes, edge_from, edge_to)
+    return np.asarray(_components_impl(n_nodes, edge_from.tolist(), edge_to.tolist()))
+
+
+def walk_paths(indptr, indices, edge_from, edge_to, node_deg,
+               node_order, node_grp_ptr, edge_order, edge_grp_ptr):
+    """
+    Chain edges into paths over a CSR adjacency (node -> incident edge ids),
+    one connected component (group) at a time.
+    Returns (edge_seq, reversed_flags, path_starts): path i uses
+    edge_seq[path_starts[i]:path_starts[i+1]], each edge walked backwards
+    where reversed_flags is True.
+    """
+    args = (indptr, indices, edge_from, edge_to, node_deg,
+            node_order, node_grp_ptr, edge_order, edge_grp_ptr)
+    if NUMBA_AVAILABLE:
+        return _walk_paths_impl(*args)
+    # plain lists index much faster than numpy scalars in the interpreter
+    return _walk_paths_impl(*(a.tolist() for a in args))
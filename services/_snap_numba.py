@@ -0,0 +1,79 @@
+# dxf2gis_gui/services/_snap_numba.py
+from __future__ import annotations
+import numpy as np
+
+# numba is optional: without it snap_and_dedup falls back to whole-array numpy ops
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+@njit(cache=True)
+def _snap_and_dedup_impl(xs, ys, offsets, tol):
+    n_lines = len(offsets) - 1
+    out_x = np.empty(len(xs))
+    out_y = np.empty(len(ys))
+    out_off = np.empty(n_lines + 1, np.int64)
+    k = 0
+    m = 0
+    out_off[0] = 0
+    for i in range(n_lines):
+        s = offsets[i]
+        e = offsets[i + 1]
+        start = k
+        for j in range(s, e):
+            x = xs[j]
+            y = ys[j]
+            if j == s or j == e - 1:  # only the ends get snapped to the grid
+                x = np.rint(x / tol) * tol
+                y = np.rint(y / tol) * tol
+            if k > start and x == out_x[k - 1] and y == out_y[k - 1]:
+                continue
+            out_x[k] = x
+            out_y[k] = y
+            k += 1
+        if k - start >= 2:
+            m += 1
+            out_off[m] = k
+        else:
+            k = start  # degenerate after snapping: drop it
+    return out_x[:k], out_y[:k], out_off[:m + 1]
+
+
+def _snap_and_dedup_numpy(xs, ys, offsets, tol):
+    heads = offsets[:-1]
+    tails = offsets[1:] - 1
+    xs = xs.copy()
+    ys = ys.copy()
+    for idx in (heads, tails):
+        xs[idx] = np.rint(xs[idx] / tol) * tol
+        ys[idx] = np.rint(ys[idx] / tol) * tol
+    keep = np.ones(len(xs), dtype=bool)
+    keep[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    keep[heads] = True  # never compare across line boundaries
+    line_of = np.repeat(np.arange(len(heads)), np.diff(offsets))
+    counts = np.bincount(line_of[keep], minlength=len(heads))
+    ok = counts >= 2
+    keep &= ok[line_of]
+    out_off = np.zeros(int(ok.sum()) + 1, dtype=np.int64)
+    np.cumsum(counts[ok], out=out_off[1:])
+    return xs[keep], ys[keep], out_off
+
+
+def snap_and_dedup(xs, ys, offsets, tol):
+    """
+    Snap the first/last vertex of every line to a `tol` grid and drop repeated
+    consecutive vertices. Lines are packed as xs/ys with line i spanning
+    offsets[i]:offsets[i+1]. Returns (xs, ys, offsets) holding only the lines
+    that still have >= 2 vertices, in input order.
+    """
+    if NUMBA_AVAILABLE:
+        return _snap_and_dedup_impl(xs, ys, offsets, float(tol))
+    return _snap_and_dedup_numpy(xs, ys, offsets, float(tol))
@@ -1,8 +1,18 @@
 # dxf2gis_gui/services/conversion_service.py
 from __future__ import annotations
+import os
+import re
+import time
+import json
+import multiprocessing
 import ezdxf
+import numpy as np
+from ezdxf import path as _ezpath
+from ezdxf.addons import iterdxf
+from math import radians as _radians
 from typing import Tuple, Dict, List, Optional, Callable
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 from shapely.geometry import (
     Point, LineString, Polygon, box,
@@ -11,14 +21,67 @@ from shapely.geometry import (
 )
 from shapely.ops import unary_union, linemerge
 from shapely import snap as shp_snap  # shapely.snap
+import shapely
+
+# orjson is optional: much faster GeoJSON encoding in the fallback writer; stdlib json otherwise
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+from services._merge_numba import walk_paths, connected_components
+from services._snap_numba import snap_and_dedup
 
 ProgressCB = Optional[Callable[[str], None]]
 
+STREAM_THRESHOLD_MB = 256  # default: files at least this big are streamed with iterdxf
+
+# bound once; these are hit per entity
+_make_path = _ezpath.make_path
+
+# Shapely 2.x ships vectorized constructors (shapely.linestrings / polygons / points)
+_SHAPELY2 = int(shapely.__version__.split(".")[0]) >= 2
+
 # =========================
 # Utilities
 # =========================
+def load_doc(path: str):
+    """ezdxf.readfile, falling back to the (slower, auditing) recover loader only for damaged files."""
+    try:
+        return ezdxf.readfile(path)
+    except ezdxf.DXFStructureError:
+        from ezdxf import recover
+        doc, _auditor = recover.readfile(path)
+        return doc
+
+def _load_block_doc(path: str):
+    """
+    `path` loaded with an empty ENTITIES section: tables, blocks and objects only. Resolves
+    INSERTs met while streaming without building the modelspace the stream avoids.
+    """
+    from io import StringIO
+    from ezdxf.filemanagement import dxf_file_info
+    encoding = dxf_file_info(path).encoding
+    out: List[str] = []
+    entity = ""  # current group-code 0 value
+    skip = False
+    with open(path, "r", encoding=encoding, errors="surrogateescape") as f:
+        for code in f:
+            value = f.readline()
+            c = code.strip()
+            if c == "0":
+                entity = value.strip()
+            if skip:
+                if entity != "ENDSEC":
+                    continue
+                skip = False
+            out.append(code)
+            out.append(value)
+            if c == "2" and entity == "SECTION" and value.strip() == "ENTITIES":
+                skip = True
+    return ezdxf.read(StringIO("".join(out)))
+
 def _sanitize_filename(name: str) -> str:
-    import re
     if name is None:
         name = "layer"
     s = str(name)
@@ -32,123 +95,238 @@ def _sanitize_filename(name: str) -> str:
         s = f"_{s}_"
     return s[:100]
 
-def _coords_to_geom(coords: List[tuple]):
-    xy = [(x, y) for x, y, _ in coords]
-    if not xy:
+def _classify_coords(coords):
+    """Return (gtype, xy) where xy is an (N,2) float array; geometry is built later."""
+    xy = np.asarray(coords, dtype=float)
+    if xy.ndim != 2 or xy.shape[0] == 0:
+        return None, None
+    xy = xy[:, :2]
+    n = xy.shape[0]
+    if n == 1:
+        return "POINT", xy
+    if n >= 4 and xy[0, 0] == xy[-1, 0] and xy[0, 1] == xy[-1, 1]:
+        return "POLYGON", xy
+    return "LINE", xy
+
+def _coords_to_geom(xy: np.ndarray):
+    """Build (gtype, geometry) straight from an (N,2) float array."""
+    n = xy.shape[0]
+    if n == 0:
         return None, None
-    if len(xy) == 1:
+    if n == 1:
         return "POINT", Point(xy[0])
-    if xy[0] == xy[-1] and len(xy) >= 4:
+    if n >= 4 and xy[0, 0] == xy[-1, 0] and xy[0, 1] == xy[-1, 1]:
         return "POLYGON", Polygon(xy)
     return "LINE", LineString(xy)
 
-def _flatten_with_path(e, dist: float) -> List[tuple]:
-    from ezdxf import path as ezpath
-    p = ezpath.make_path(e)
-    return [(v.x, v.y, 0.0) for v in p.flattening(distance=dist)]
+class _FeatureColumns:
+    """
+    Column-wise feature buffer: parallel layer / geom / geometry / block_name lists.
+    Rows added with add_coords() keep raw (N,2) coords until materialize() builds
+    their geometries in one vectorized call per gtype.
+    """
+    __slots__ = ("layer", "geom", "geometry", "block_name", "_pending")
+
+    def __init__(self):
+        self.layer: List[str] = []
+        self.geom: List[str] = []
+        self.geometry: list = []
+        self.block_name: List[Optional[str]] = []
+        self._pending: Dict[str, List[tuple]] = defaultdict(list)  # gtype -> [(row, xy)]
+
+    def __len__(self) -> int:
+        return len(self.layer)
+
+    def add(self, layer: str, gtype: str, geometry, block_name: Optional[str] = None) -> None:
+        self.layer.append(layer)
+        self.geom.append(gtype)
+        self.geometry.append(geometry)
+        self.block_name.append(block_name)
+
+    def add_coords(self, layer: str, coords) -> None:
+        gtype, xy = _classify_coords(coords)
+        if gtype is None:
+            return
+        self._pending[gtype].append((len(self.layer), xy))
+        self.add(layer, gtype, None)
+
+    def extend(self, other: "_FeatureColumns") -> None:
+        base = len(self)
+        for gtype, items in other._pending.items():
+            self._pending[gtype].extend((base + i, xy) for i, xy in items)
+        self.layer += other.layer
+        self.geom += other.geom
+        self.geometry += other.geometry
+        self.block_name += other.block_name
+
+    def materialize(self) -> None:
+        for gtype, items in self._pending.items():
+            idx = [i for i, _ in items]
+            arrays = [xy for _, xy in items]
+            if not _SHAPELY2:
+                ctor = Point if gtype == "POINT" else Polygon if gtype == "POLYGON" else LineString
+                geoms = [ctor(xy[0] if gtype == "POINT" else xy) for xy in arrays]
+            elif gtype == "POINT":
+                geoms = shapely.points(np.vstack([xy[:1] for xy in arrays]))
+            else:
+                coords = np.concatenate(arrays)
+                indices = np.repeat(np.arange(len(arrays)), [len(xy) for xy in arrays])
+                if gtype == "POLYGON":
+                    geoms = shapely.polygons(shapely.linearrings(coords, indices=indices))
+                else:
+                    geoms = shapely.linestrings(coords, indices=indices)
+            for i, g in zip(idx, geoms):
+                self.geometry[i] = g
+        self._pending.clear()
+
+    def to_gdf(self, crs: str) -> "gpd.GeoDataFrame":
+        import geopandas as gpd
+        self.materialize()
+        data = {"layer": self.layer, "geom": self.geom, "geometry": self.geometry}
+        if any(b is not None for b in self.block_name):
+            data["block_name"] = self.block_name
+        return gpd.GeoDataFrame(data, geometry="geometry", crs=crs)
+
+def _flatten_with_path(e, dist: float) -> np.ndarray:
+    """Drain the ezdxf flattening iterator into a growing (N,2) buffer."""
+    p = _make_path(e)
+    buf = np.empty((64, 2))
+    n = 0
+    for v in p.flattening(distance=dist):
+        if n == len(buf):
+            buf = np.resize(buf, (2 * len(buf), 2))
+        buf[n, 0] = v.x
+        buf[n, 1] = v.y
+        n += 1
+    return buf[:n]
 
-def _fallback_polyline(e, include_3d: bool) -> List[tuple]:
-    pts: List[tuple] = []
+def _fallback_polyline(e) -> np.ndarray:
     if hasattr(e, "get_points"):
-        for v in e.get_points():
-            pts.append((v[0], v[1], 0.0))
+        pts = [(v[0], v[1]) for v in e.get_points()]
     else:
-        for v in e:
-            loc = v.dxf.location
-            pts.append((loc.x, loc.y, loc.z if include_3d else 0.0))
-    return pts
+        pts = [(v.dxf.location.x, v.dxf.location.y) for v in e]
+    return np.array(pts, dtype=float).reshape(-1, 2)
 
-def _fallback_circle(e, dist: float) -> List[tuple]:
-    import math
+def _fallback_circle(e, dist: float) -> np.ndarray:
     c = e.dxf.center
     r = float(e.dxf.radius)
     segs = max(24, int(6.28318530718 / max(dist, 0.1)))
-    return [(c.x + r * math.cos(2 * math.pi * i / segs),
-             c.y + r * math.sin(2 * math.pi * i / segs), 0.0)
-            for i in range(segs + 1)]
+    t = np.linspace(0.0, 2 * np.pi, segs + 1)
+    pts = np.empty((segs + 1, 2))
+    pts[:, 0] = c.x + r * np.cos(t)
+    pts[:, 1] = c.y + r * np.sin(t)
+    return pts
 
-def _fallback_arc(e, dist: float) -> List[tuple]:
-    import math
+def _fallback_arc(e, dist: float) -> np.ndarray:
     c = e.dxf.center
     r = float(e.dxf.radius)
-    a1 = math.radians(float(e.dxf.start_angle))
-    a2 = math.radians(float(e.dxf.end_angle))
+    a1 = _radians(float(e.dxf.start_angle))
+    a2 = _radians(float(e.dxf.end_angle))
     if a2 < a1:
         a1, a2 = a2, a1
     steps = max(16, int((a2 - a1) / max(dist, 0.05)))
-    return [(c.x + r * math.cos(a1 + (a2 - a1) * i / steps),
-             c.y + r * math.sin(a1 + (a2 - a1) * i / steps), 0.0)
-            for i in range(steps + 1)]
+    t = np.linspace(a1, a2, steps + 1)
+    pts = np.empty((steps + 1, 2))
+    pts[:, 0] = c.x + r * np.cos(t)
+    pts[:, 1] = c.y + r * np.sin(t)
+    return pts
 
-def _flatten_hatch_rings(e) -> List[List[tuple]]:
-    rings: List[List[tuple]] = []
+def _close_ring(ring: np.ndarray) -> np.ndarray:
+    if not (ring[0, 0] == ring[-1, 0] and ring[0, 1] == ring[-1, 1]):
+        ring = np.vstack([ring, ring[:1]])
+    return ring
+
+def _flatten_hatch_rings(e) -> List[np.ndarray]:
+    """Boundary rings of a HATCH as closed (N,2) arrays."""
+    rings: List[np.ndarray] = []
     try:
         for p in e.paths.polygons:  # type: ignore
-            ring = [(pt[0], pt[1], 0.0) for pt in p]
-            if ring and ring[0] != ring[-1]:
-                ring.append(ring[0])
-            if ring:
-                rings.append(ring)
+            ring = np.asarray(p, dtype=float).reshape(len(p), -1)[:, :2]
+            if ring.shape[0]:
+                rings.append(_close_ring(ring))
     except Exception:
         pass
     try:
         if not rings:
             for path in e.paths:
-                ring = []
-                for edge in path.edges:
-                    if hasattr(edge, "start"):
-                        s = edge.start
-                        ring.append((s[0], s[1], 0.0))
-                if ring and ring[0] != ring[-1]:
-                    ring.append(ring[0])
-                if ring:
-                    rings.append(ring)
+                starts = [(edge.start[0], edge.start[1]) for edge in path.edges if hasattr(edge, "start")]
+                if starts:
+                    rings.append(_close_ring(np.array(starts, dtype=float)))
     except Exception:
         pass
     return rings
 
-def _precise_rows_from_entity(e, layer, include_3d, dist) -> List[dict]:
-    rows: List[dict] = []
-    t = e.dxftype()
-    if t in {"LINE", "LWPOLYLINE", "POLYLINE", "CIRCLE", "ARC", "ELLIPSE", "SPLINE"}:
-        try:
-            pts = _flatten_with_path(e, dist)
-        except Exception:
-            if t == "LINE":
-                s, ed = e.dxf.start, e.dxf.end
-                pts = [(s.x, s.y, s.z if include_3d else 0.0),
-                       (ed.x, ed.y, ed.z if include_3d else 0.0)]
-            elif t in {"LWPOLYLINE", "POLYLINE"}:
-                pts = _fallback_polyline(e, include_3d)
-            elif t == "CIRCLE":
-                pts = _fallback_circle(e, dist)
-            elif t == "ARC":
-                pts = _fallback_arc(e, dist)
-            else:
-                pts = []
-        if pts:
-            gtype, geom = _coords_to_geom(pts)
-            if gtype and geom:
-                rows.append({"layer": layer, "geom": gtype, "geometry": geom})
-    elif t == "POINT":
-        p = e.dxf.location
-        rows.append({"layer": layer, "geom": "POINT", "geometry": Point(p.x, p.y)})
-    elif t == "HATCH":
-        for ring in _flatten_hatch_rings(e):
-            gtype, geom = _coords_to_geom(ring)
-            if gtype and geom:
-                rows.append({"layer": layer, "geom": gtype, "geometry": geom})
-    elif t in {"3DFACE", "THREE_D_FACE", "SOLID"}:
-        try:
-            v0, v1, v2, v3 = e.dxf.vtx0, e.dxf.vtx1, e.dxf.vtx2, e.dxf.vtx3
-            ring = [(v0.x, v0.y, 0.0), (v1.x, v1.y, 0.0),
-                    (v2.x, v2.y, 0.0), (v3.x, v3.y, 0.0), (v0.x, v0.y, 0.0)]
-            gtype, geom = _coords_to_geom(ring)
-            if gtype and geom:
-                rows.append({"layer": layer, "geom": gtype, "geometry": geom})
-        except Exception:
-            pass
-    return rows
+def _flatten_curve(e, t: str, dist: float) -> np.ndarray:
+    try:
+        return _flatten_with_path(e, dist)
+    except Exception:
+        if t == "LINE":
+            s, ed = e.dxf.start, e.dxf.end
+            return np.array([(s.x, s.y), (ed.x, ed.y)])
+        if t in {"LWPOLYLINE", "POLYLINE"}:
+            return _fallback_polyline(e)
+        if t == "CIRCLE":
+            return _fallback_circle(e, dist)
+        if t == "ARC":
+            return _fallback_arc(e, dist)
+        return np.empty((0, 2))
+
+_CURVE_TYPES = {"LINE", "LWPOLYLINE", "POLYLINE", "ARC", "CIRCLE", "ELLIPSE", "SPLINE"}
+_FACE_TYPES = {"HATCH", "3DFACE", "THREE_D_FACE", "SOLID"}
+
+def _flatten_block_once(block, dist: float, cache: Dict[tuple, List[tuple]]) -> List[tuple]:
+    """
+    Flatten a block definition into local-space parts [(layer, "LINE"|"POLYGON", (N,2) array)],
+    cached per (block name, dist) so repeated INSERTs of the same block reuse it.
+    """
+    key = (block.name, dist)
+    parts = cache.get(key)
+    if parts is not None:
+        return parts
+    parts = []
+    for se in block:
+        st = se.dxftype()
+        sl = getattr(se.dxf, "layer", "0") or "0"
+        if st in _CURVE_TYPES:
+            pts = _flatten_curve(se, st, dist)
+            if len(pts):
+                parts.append((sl, "LINE", pts))
+        elif st in _FACE_TYPES:
+            for ring in _flatten_hatch_rings(se):
+                parts.append((sl, "POLYGON", ring))
+    cache[key] = parts
+    return parts
+
+def _rows_curve(e, t, layer, dist, out: _FeatureColumns) -> None:
+    pts = _flatten_curve(e, t, dist)
+    if len(pts):
+        out.add_coords(layer, pts)
+
+def _rows_point(e, t, layer, dist, out: _FeatureColumns) -> None:
+    p = e.dxf.location
+    out.add_coords(layer, [(p.x, p.y)])
+
+def _rows_hatch(e, t, layer, dist, out: _FeatureColumns) -> None:
+    for ring in _flatten_hatch_rings(e):
+        out.add_coords(layer, ring)
+
+def _rows_face(e, t, layer, dist, out: _FeatureColumns) -> None:
+    try:
+        v0, v1, v2, v3 = e.dxf.vtx0, e.dxf.vtx1, e.dxf.vtx2, e.dxf.vtx3
+        ring = [(v0.x, v0.y), (v1.x, v1.y), (v2.x, v2.y), (v3.x, v3.y), (v0.x, v0.y)]
+        out.add_coords(layer, ring)
+    except Exception:
+        pass
+
+# dxftype -> handler(e, dxftype, layer, flatten dist, out); unknown types are ignored
+_ENTITY_HANDLERS: Dict[str, Callable] = {
+    **{t: _rows_curve for t in _CURVE_TYPES},
+    "POINT": _rows_point,
+    "HATCH": _rows_hatch,
+    "3DFACE": _rows_face,
+    "THREE_D_FACE": _rows_face,
+    "SOLID": _rows_face,
+}
 
 # =========================
 # Line merging helpers
@@ -156,28 +334,28 @@ def _precise_rows_from_entity(e, layer, include_3d, dist) -> List[dict]:
 def _grid_snap_lines(lines: List[LineString], tol: float) -> List[LineString]:
     if tol <= 0 or not lines:
         return lines
-    def q(x): return round(x / tol) * tol
-    out = []
+    arrays = []
     for ls in lines:
         try:
-            coords = list(ls.coords)
-            if len(coords) < 2:
-                continue
-            head = (q(coords[0][0]), q(coords[0][1]))
-            tail = (q(coords[-1][0]), q(coords[-1][1]))
-            mid = coords[1:-1]
-            new = [head] + mid + [tail]
-            clean = [new[0]]
-            for p in new[1:]:
-                if p != clean[-1]:
-                    clean.append(p)
-            if len(clean) >= 2:
-                ls2 = LineString(clean)
-                if ls2.length > 0:
-                    out.append(ls2)
+            coords = np.asarray(ls.coords)[:, :2]
+            if len(coords) >= 2:
+                arrays.append(coords)
         except Exception:
             continue
-    return out
+    if not arrays:
+        return []
+    # pack every line into flat x/y arrays + offsets and snap/dedup them in one kernel call
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in arrays], out=offsets[1:])
+    coords = np.concatenate(arrays).astype(np.float64)
+    xs, ys, offsets = snap_and_dedup(coords[:, 0].copy(), coords[:, 1].copy(), offsets, tol)
+    if len(offsets) < 2:
+        return []
+    xy = np.column_stack([xs, ys])
+    if _SHAPELY2:
+        indices = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        return list(shapely.linestrings(xy, indices=indices))
+    return [LineString(xy[a:b]) for a, b in zip(offsets[:-1], offsets[1:])]
 
 def _merge_lines_robust(lines: List[LineString], tol: float, say=lambda m: None):
     if not lines:
@@ -186,6 +364,14 @@ def _merge_lines_robust(lines: List[LineString], tol: float, say=lambda m: None)
         L1 = _grid_snap_lines(lines, tol)
         if not L1:
             return None
+        # snapped block children rarely cross: try merging without the noding pass first
+        try:
+            ml = shapely.multilinestrings(L1) if _SHAPELY2 else MultiLineString(L1)
+            m0 = linemerge(ml)
+            if m0 and not m0.is_empty and (isinstance(m0, LineString) or len(m0.geoms) < len(L1) * 0.5):
+                return m0
+        except Exception as ex:
+            say(f"[merge] direct linemerge failed: {ex}")
         u1 = unary_union(L1)
         m1 = linemerge(u1)
         if m1 and not getattr(m1, "is_empty", False):
@@ -210,89 +396,88 @@ def _merge_lines_robust(lines: List[LineString], tol: float, say=lambda m: None)
         say(f"[merge] exception: {ex}")
     return None
 
+def _endpoint_keys(ends: np.ndarray, tol: float) -> np.ndarray:
+    """Hashable keys for (N,2) endpoints: one packed int64 per grid cell when tol > 0."""
+    if tol <= 0:
+        return ends
+    cells = np.round(ends / tol).astype(np.int64)
+    cells -= cells.min(axis=0)
+    if cells.max(initial=0) < (1 << 31):
+        return (cells[:, 0] << 32) | cells[:, 1]
+    return cells  # grid too large to pack; fall back to row-wise unique
+
 def _merge_lines_graph(lines: List[LineString], tol: float):
     if not lines:
         return None
-    def q(x): return round(x / tol) * tol if tol > 0 else x
-    endpoints = []
+    edges = []
     for ls in lines:
         try:
-            coords = list(ls.coords)
+            coords = np.asarray(ls.coords)[:, :2]
             if len(coords) < 2:
                 continue
-            a = (q(coords[0][0]), q(coords[0][1]))
-            b = (q(coords[-1][0]), q(coords[-1][1]))
-            endpoints.append((a, b, coords))
+            edges.append(coords)
         except Exception:
             continue
-    if not endpoints:
+    if not edges:
         return None
-    node_deg = defaultdict(int)
-    adj = defaultdict(list)
-    edges = []
-    for i, (a, b, coords) in enumerate(endpoints):
-        edges.append((a, b, coords))
-        adj[a].append(i); adj[b].append(i)
-        node_deg[a] += 1; node_deg[b] += 1
-    used_edge = [False]*len(edges)
-
-    def build_path(start_node):
-        path = []
-        cur = start_node
-        while True:
-            nxt = None
-            for ei in adj[cur]:
-                if not used_edge[ei]:
-                    nxt = ei; break
-            if nxt is None: break
-            used_edge[nxt] = True
-            a, b, coords = edges[nxt]
-            if a == cur:
-                seg = coords; other = b
-            else:
-                seg = list(reversed(coords)); other = a
-            if not path:
-                path.extend(seg)
-            else:
-                path.extend(seg[1:] if path[-1] == seg[0] else seg)
-            if node_deg[other] != 2:
-                break
-            cur = other
-        return path
-
-    merged = []
-    for node, deg in node_deg.items():
-        if deg != 2:
-            while any(not used_edge[e] for e in adj[node]):
-                coords = build_path(node)
-                if coords and len(coords) >= 2:
-                    try: merged.append(LineString(coords))
-                    except: pass
-    for ei, used in enumerate(used_edge):
-        if not used:
-            a, b, coords0 = edges[ei]
-            used_edge[ei] = True
-            cur_coords = list(coords0); cur_node = b
-            while True:
-                nxt = None
-                for ej in adj[cur_node]:
-                    if not used_edge[ej]:
-                        nxt = ej; break
-                if nxt is None: break
-                used_edge[nxt] = True
-                a2, b2, coords2 = edges[nxt]
-                if a2 == cur_node:
-                    seg = coords2; cur_node = b2
-                else:
-                    seg = list(reversed(coords2)); cur_node = a2
-                cur_coords.extend(seg[1:] if cur_coords[-1] == seg[0] else seg)
-                if node_deg[cur_node] != 2:
-                    break
-            if len(cur_coords) >= 2:
-                try: merged.append(LineString(cur_coords))
-                except: pass
-    if not merged:
+
+    # endpoints as [a0, b0, a1, b1, ...] → dense node ids
+    ends = np.empty((2 * len(edges), 2))
+    ends[0::2] = [c[0] for c in edges]
+    ends[1::2] = [c[-1] for c in edges]
+    keys = _endpoint_keys(ends, tol)
+    uniq, first, node_of = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    node_of = node_of.reshape(-1).astype(np.int64)
+    n_nodes = len(uniq)
+    edge_from = node_of[0::2].copy()
+    edge_to = node_of[1::2].copy()
+    node_deg = np.bincount(node_of, minlength=n_nodes).astype(np.int64)
+
+    # CSR adjacency: node → incident edge ids (in edge order)
+    order = np.argsort(node_of, kind="stable")
+    indices = (order // 2).astype(np.int64)
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(node_deg, out=indptr[1:])
+
+    # union-find → connected components, walked one at a time in first-seen order
+    roots = connected_components(n_nodes, edge_from, edge_to)
+    comp_first = np.full(n_nodes, len(node_of), dtype=np.int64)
+    np.minimum.at(comp_first, roots, first)
+    comp_rank = np.empty(n_nodes, dtype=np.int64)
+    comp_rank[np.argsort(comp_first, kind="stable")] = np.arange(n_nodes)
+    node_comp = comp_rank[roots]
+    n_comps = len(np.unique(roots))
+    node_order = np.lexsort((first, node_comp)).astype(np.int64)
+    node_grp_ptr = np.zeros(n_comps + 1, dtype=np.int64)
+    np.cumsum(np.bincount(node_comp, minlength=n_comps)[:n_comps], out=node_grp_ptr[1:])
+    edge_comp = node_comp[edge_from]
+    edge_order = np.argsort(edge_comp, kind="stable").astype(np.int64)
+    edge_grp_ptr = np.zeros(n_comps + 1, dtype=np.int64)
+    np.cumsum(np.bincount(edge_comp, minlength=n_comps)[:n_comps], out=edge_grp_ptr[1:])
+
+    seq, rev, starts = walk_paths(indptr, indices, edge_from, edge_to, node_deg,
+                                  node_order, node_grp_ptr, edge_order, edge_grp_ptr)
+
+    paths = []
+    for pi in range(len(starts) - 1):
+        parts = []
+        for k in range(starts[pi], starts[pi + 1]):
+            seg = edges[seq[k]]
+            if rev[k]:
+                seg = seg[::-1]
+            if parts and parts[-1][-1, 0] == seg[0, 0] and parts[-1][-1, 1] == seg[0, 1]:
+                seg = seg[1:]
+            parts.append(seg)
+        path = np.concatenate(parts)
+        if len(path) >= 2:
+            paths.append(path)
+    if not paths:
         return None
+    if _SHAPELY2:
+        indices = np.repeat(np.arange(len(paths)), [len(pth) for pth in paths])
+        merged = list(shapely.linestrings(np.concatenate(paths), indices=indices))
+    else:
+        merged = [LineString(pth) for pth in paths]
     return merged[0] if len(merged) == 1 else MultiLineString([ls for ls in merged if ls.length > 0])
 
 def _extract_lineal(geom):
@@ -320,6 +505,9 @@ def _extract_lineal(geom):
             return MultiLineString(flat) if flat else None
     return None
 
+# GEOS type ids: 0=Point, 3=Polygon, 4=MultiPoint, 6=MultiPolygon
+_WANT_TYPE_IDS = {"POLYGON": [3, 6], "POINT": [0, 4]}
+
 def _normalize_bucket_geoms(layer_geom_key: tuple, gdf):
     want = (layer_geom_key[1] or "").upper()
     if want == "LINE":
@@ -331,58 +519,88 @@ def _normalize_bucket_geoms(layer_geom_key: tuple, gdf):
         gdf["geometry"] = fixed
         gdf = gdf[~gdf.geometry.isna() & ~gdf.geometry.is_empty]
         return gdf
-    elif want == "POLYGON":
-        mask = gdf.geometry.apply(lambda g: isinstance(g, (Polygon, MultiPolygon)) and g and not g.is_empty)
-        return gdf.loc[mask].copy()
-    elif want == "POINT":
-        mask = gdf.geometry.apply(lambda g: isinstance(g, (Point, MultiPoint)) and g and not g.is_empty)
+    elif want in _WANT_TYPE_IDS:
+        if _SHAPELY2:
+            arr = np.asarray(gdf.geometry.values)
+            mask = np.isin(shapely.get_type_id(arr), _WANT_TYPE_IDS[want]) & ~shapely.is_empty(arr)
+            return gdf.iloc[mask].copy()
+        classes = (Polygon, MultiPolygon) if want == "POLYGON" else (Point, MultiPoint)
+        mask = gdf.geometry.apply(lambda g: isinstance(g, classes) and g and not g.is_empty)
         return gdf.loc[mask].copy()
     return gdf
 
 # =========================
 # Precise convert
 # =========================
-def precise_convert(
-    dxf_paths: List[str],
-    *,
-    source_epsg: int = 3826,
-    target_epsg: Optional[int] = None,
-    include_3d: bool = False,
-    flat_dist_precise: float = 0.2,
-    target_layers: Optional[List[str]] = None,
-    bbox_wgs84: Optional[Tuple[float, float, float, float]] = None,
-    on_progress: ProgressCB = None,
-    block_mode: str = "keep-merge",
-    line_merge_tol: float = 0.2,
-    fallback_explode_lines: bool = True,
-    # ---- new knobs to avoid hangs on huge blocks ----
-    keep_merge_small_limit: int = 2_000,       # <= this many segments → robust merge
-    keep_merge_medium_limit: int = 20_000,     # <= this many segments → graph merge
-    keep_merge_time_soft_ms: int = 2_000,      # per-block soft budget; exceed → downgrade strategy
-) -> Dict[Tuple[str, str], "gpd.GeoDataFrame"]:
-    import time
-    import geopandas as gpd
+def _push_line_from_pts(pts: np.ndarray, lines: List[LineString], counter: List[int]) -> None:
+    """Append an (N,2) block child as a LINE (closed ones are reopened); counter[0] counts pushes."""
+    n = len(pts)
+    if n < 2:
+        return
+    if n >= 3 and pts[0, 0] == pts[-1, 0] and pts[0, 1] == pts[-1, 1]:
+        pts = pts[:-1]  # treat as LINE even if closed
+    try:
+        lines.append(LineString(pts))
+        counter[0] += 1
+    except Exception:
+        pass
 
-    def say(m):
-        if on_progress:
-            try: on_progress(m)
-            except: pass
+def _query_layers(msp, sel_layers):
+    """
+    Narrow modelspace to the wanted layers with one ezdxf query (entity order kept).
+    Returns (entities, True), or (msp, False) when a layer name can't be quoted in a query.
+    """
+    names = set(sel_layers)
+    if "0" in names:
+        names.add("")  # entities with a blank layer are treated as "0"
+    if any('"' in n or "'" in n for n in names):
+        return msp, False
+    return msp.query("*[" + " | ".join(f'layer=="{n}"' for n in sorted(names)) + "]"), True
 
-    sel_layers = set(target_layers) if target_layers else None
-    say(f"[convert] srcEPSG={source_epsg} tgtEPSG={target_epsg} bbox={bbox_wgs84} include_3d={include_3d} block_mode={block_mode}")
+def _convert_one_file(path: str, opts: dict, say, doc=None) -> _FeatureColumns:
+    """
+    Scan one DXF's modelspace into feature columns (geometries may still be pending).
+    An already parsed `doc` for `path` skips reading the file again.
+    """
+    flat_dist_precise = opts["flat_dist_precise"]
+    sel_layers = opts["sel_layers"]
+    block_mode = opts["block_mode"]
+    line_merge_tol = opts["line_merge_tol"]
+    keep_merge_small_limit = opts["keep_merge_small_limit"]
+    keep_merge_medium_limit = opts["keep_merge_medium_limit"]
+    keep_merge_time_soft_ms = opts["keep_merge_time_soft_ms"]
 
-    rows: List[dict] = []
-    for path in dxf_paths:
-        try:
-            say(f"[convert] read: {path}")
-            doc = ezdxf.readfile(path)
+    stream_min_bytes = opts["stream_min_bytes"]
+
+    rows = _FeatureColumns()
+    stream = None
+    prefiltered = False
+    try:
+        say(f"[convert] read: {path}" if doc is None else f"[convert] cached doc: {path}")
+        if doc is None and stream_min_bytes and os.path.getsize(path) >= stream_min_bytes:
+            # huge file: stream modelspace entities instead of loading the whole document
+            try:
+                stream = iterdxf.opendxf(path)
+                msp = stream.modelspace()
+                say("[convert] streaming modelspace (iterdxf)")
+            except Exception as ex:
+                say(f"[warn] streaming unavailable ({ex}); loading whole document")
+                stream = None
+        if stream is None:
+            if doc is None:
+                doc = load_doc(path)
             msp = doc.modelspace()
-        except Exception as ex:
-            say(f"[error] read failed: {ex}")
-            continue
+            if sel_layers:
+                msp, prefiltered = _query_layers(msp, sel_layers)
+    except Exception as ex:
+        say(f"[error] read failed: {ex}")
+        return rows
 
-        count = 0
-        ins_count = 0
+    count = 0
+    ins_count = 0
+    block_cache: Dict[tuple, List[tuple]] = {}
+    block_doc = None  # streaming: tables/blocks only, for INSERTs
+    try:
         for e in msp:
             count += 1
             if count % 1000 == 0:
@@ -391,11 +609,22 @@ def precise_convert(
             try:
                 t = e.dxftype()
                 layer = getattr(e.dxf, "layer", "0") or "0"
-                if sel_layers and layer not in sel_layers:
+                if sel_layers and not prefiltered and layer not in sel_layers:
                     # Early skip prevents expanding huge INSERTs from other layers
                     continue
 
                 if t == "INSERT":
+                    if stream is not None:
+                        # streamed entities carry no document: attach the INSERT to a copy of the
+                        # drawing without its modelspace (loaded once) so block()/virtual_entities() work
+                        if block_doc is None:
+                            say("[convert] INSERT while streaming; loading block definitions")
+                            try:
+                                block_doc = _load_block_doc(path)
+                            except Exception as ex:
+                                say(f"[warn] block definitions unreadable ({ex}); loading whole document")
+                                block_doc = load_doc(path)
+                        e.doc = block_doc
                     ins_count += 1
                     if ins_count % 50 == 0:
                         say(f"[convert] …INSERT expanded: {ins_count}")
@@ -406,57 +635,36 @@ def precise_convert(
                         lines: List[LineString] = []
                         bname = (getattr(e.dxf, "name", None) or getattr(e, "name", None) or "")
                         t0 = time.perf_counter()
-                        segs_seen = 0
-
-                        def _push_line_from_pts(pts):
-                            nonlocal segs_seen
-                            if not pts: return
-                            xy = [(x, y) for x, y, _ in pts]
-                            if len(xy) >= 2:
-                                if xy[0] == xy[-1] and len(xy) >= 3:
-                                    xy = xy[:-1]  # treat as LINE even if closed
-                                if len(xy) >= 2:
-                                    try:
-                                        lines.append(LineString(xy))
-                                        segs_seen += 1
-                                    except Exception:
-                                        pass
-                            # progress ping for very large blocks
-                            if segs_seen and segs_seen % 5000 == 0:
-                                say(f"[keep] block={bname} collected {segs_seen} segments…")
+                        seg_counter = [0]
 
-                        # Expand children only if the parent layer passes filter
+                        # Expand children only if the parent layer passes filter.
+                        # The block definition is flattened once; each INSERT only
+                        # applies its transform matrix to the cached local coords.
                         try:
-                            for se in e.virtual_entities():
-                                sl = getattr(se.dxf, "layer", "0") or "0"
+                            blk = e.block()
+                            if blk is None:
+                                raise ezdxf.DXFStructureError(f'Required block definition for "{bname}" does not exist.')
+                            scale = max(abs(float(e.dxf.xscale)), abs(float(e.dxf.yscale))) or 1.0
+                            parts = _flatten_block_once(blk, flat_dist_precise / scale, block_cache)
+                            m = np.array(list(e.matrix44().rows()), dtype=float)
+                            for sl, kind, local in parts:
                                 if sel_layers and sl not in sel_layers:
                                     continue
-                                st = se.dxftype()
-                                if st in {"LINE","LWPOLYLINE","POLYLINE","ARC","CIRCLE","ELLIPSE","SPLINE"}:
-                                    try:
-                                        pts = _flatten_with_path(se, flat_dist_precise)
-                                    except Exception:
-                                        if st == "LINE":
-                                            s, ed = se.dxf.start, se.dxf.end
-                                            pts = [(s.x, s.y, 0.0), (ed.x, ed.y, 0.0)]
-                                        elif st in {"LWPOLYLINE","POLYLINE"}:
-                                            pts = _fallback_polyline(se, include_3d=False)
-                                        elif st == "CIRCLE":
-                                            pts = _fallback_circle(se, flat_dist_precise)
-                                        elif st == "ARC":
-                                            pts = _fallback_arc(se, flat_dist_precise)
-                                        else:
-                                            pts = []
-                                    _push_line_from_pts(pts)
-                                elif st in {"HATCH","3DFACE","THREE_D_FACE","SOLID"}:
-                                    for ring in _flatten_hatch_rings(se):
-                                        gtype, geom = _coords_to_geom(ring)
-                                        if gtype == "POLYGON" and geom:
-                                            polys.append(geom)
+                                world = local @ m[:2, :2] + m[3, :2]  # local z is 0
+                                if kind == "LINE":
+                                    _push_line_from_pts(world, lines, seg_counter)
+                                    # progress ping for very large blocks
+                                    if seg_counter[0] and seg_counter[0] % 5000 == 0:
+                                        say(f"[keep] block={bname} collected {seg_counter[0]} segments…")
+                                else:
+                                    gtype, geom = _coords_to_geom(world)
+                                    if gtype == "POLYGON" and geom:
+                                        polys.append(geom)
                         except Exception as ex:
-                            say(f"[warn] virtual_entities failed: {ex}")
+                            say(f"[warn] block expansion failed: {ex}")
 
                         # Decide merging strategy based on size/time
+                        segs_seen = seg_counter[0]
                         elapsed_ms = (time.perf_counter() - t0) * 1000.0
                         strategy = "robust"  # robust → graph → explode
                         if segs_seen > keep_merge_medium_limit:
@@ -490,7 +698,7 @@ def precise_convert(
                                 for ls in lines:
                                     try:
                                         if ls and not getattr(ls, "is_empty", False):
-                                            rows.append({"layer": layer, "geom": "LINE", "geometry": ls, "block_name": str(bname)})
+                                            rows.add(layer, "LINE", ls, str(bname))
                                             n += 1
                                     except Exception:
                                         continue
@@ -503,11 +711,11 @@ def precise_convert(
                                 gtype = "LINE"
 
                         if merged is not None and gtype is not None:
-                            rows.append({"layer": layer, "geom": gtype, "geometry": merged, "block_name": str(bname)})
+                            rows.add(layer, gtype, merged, str(bname))
                         else:
                             # last resort: drop a point at insertion
                             ip = e.dxf.insert
-                            rows.append({"layer": layer, "geom": "POINT", "geometry": Point(ip.x, ip.y), "block_name": str(bname)})
+                            rows.add(layer, "POINT", Point(ip.x, ip.y), str(bname))
                         continue  # INSERT handled
 
                     # explode mode (original)
@@ -517,45 +725,151 @@ def precise_convert(
                             sl = getattr(se.dxf, "layer", "0") or "0"
                             if sel_layers and sl not in sel_layers:
                                 continue
-                            rows += _precise_rows_from_entity(se, sl, include_3d, flat_dist_precise)
+                            st = se.dxftype()
+                            handler = _ENTITY_HANDLERS.get(st)
+                            if handler is not None:
+                                handler(se, st, sl, flat_dist_precise, rows)
                             expanded = True
                     except Exception as ex:
                         say(f"[warn] INSERT explode failed: {ex}")
                     if not expanded:
                         ip = e.dxf.insert
-                        rows.append({"layer": layer, "geom": "POINT", "geometry": Point(ip.x, ip.y)})
+                        rows.add(layer, "POINT", Point(ip.x, ip.y))
                     continue  # end INSERT
 
                 # Non-INSERT entities
-                rows += _precise_rows_from_entity(e, layer, include_3d, flat_dist_precise)
+                handler = _ENTITY_HANDLERS.get(t)
+                if handler is not None:
+                    handler(e, t, layer, flat_dist_precise, rows)
             except Exception as ex:
                 say(f"[warn] entity failed: {ex}")
                 continue
 
-        say(f"[convert] done file: {path}, total rows {len(rows)}")
+    finally:
+        if stream is not None:
+            stream.close()
+    say(f"[convert] done file: {path}, rows {len(rows)}")
+    return rows
+
+def _convert_one_file_worker(path: str, opts: dict) -> Tuple[_FeatureColumns, List[str]]:
+    # runs in a child process: progress is buffered and replayed by the parent
+    msgs: List[str] = []
+    return _convert_one_file(path, opts, msgs.append), msgs
+
+def _to_crs(gdf: "gpd.GeoDataFrame", epsg: int) -> "gpd.GeoDataFrame":
+    """Same as gdf.to_crs(epsg=...), but with one pyproj call over every coordinate."""
+    if not _SHAPELY2 or gdf.crs is None or not len(gdf):
+        return gdf.to_crs(epsg=epsg)
+    import geopandas as gpd
+    from pyproj import Transformer
+    geoms = np.asarray(gdf.geometry.values)
+    if shapely.has_z(geoms).any():
+        return gdf.to_crs(epsg=epsg)
+    xy = shapely.get_coordinates(geoms)
+    xs, ys = xy[:, 0].copy(), xy[:, 1].copy()
+    Transformer.from_crs(gdf.crs, f"EPSG:{epsg}", always_xy=True).transform(xs, ys, inplace=True)
+    xy[:, 0] = xs
+    xy[:, 1] = ys
+    new_geoms = shapely.set_coordinates(geoms.copy(), xy)
+    return gdf.set_geometry(gpd.GeoSeries(new_geoms, index=gdf.index, crs=f"EPSG:{epsg}"))
+
+def precise_convert(
+    dxf_paths: List[str],
+    *,
+    source_epsg: int = 3826,
+    target_epsg: Optional[int] = None,
+    include_3d: bool = False,                  # accepted for compatibility; output is always 2D
+    flat_dist_precise: float = 0.2,
+    target_layers: Optional[List[str]] = None,
+    bbox_wgs84: Optional[Tuple[float, float, float, float]] = None,
+    on_progress: ProgressCB = None,
+    block_mode: str = "keep-merge",
+    line_merge_tol: float = 0.2,
+    fallback_explode_lines: bool = True,
+    # ---- new knobs to avoid hangs on huge blocks ----
+    keep_merge_small_limit: int = 2_000,       # <= this many segments → robust merge
+    keep_merge_medium_limit: int = 20_000,     # <= this many segments → graph merge
+    keep_merge_time_soft_ms: int = 2_000,      # per-block soft budget; exceed → downgrade strategy
+    max_workers: Optional[int] = None,         # processes for multi-file input (1 = serial)
+    preloaded_docs: Optional[Dict[str, "ezdxf.document.Drawing"]] = None,  # path → parsed doc (skip re-reading)
+    stream_threshold_mb: int = STREAM_THRESHOLD_MB,  # files at least this big are streamed with iterdxf (0 = never)
+) -> Dict[Tuple[str, str], "gpd.GeoDataFrame"]:
+    def say(m):
+        if on_progress:
+            try: on_progress(m)
+            except: pass
+
+    sel_layers = set(target_layers) if target_layers else None
+    say(f"[convert] srcEPSG={source_epsg} tgtEPSG={target_epsg} bbox={bbox_wgs84} include_3d={include_3d} block_mode={block_mode}")
+
+    opts = {
+        "include_3d": include_3d,
+        "flat_dist_precise": flat_dist_precise,
+        "sel_layers": sel_layers,
+        "block_mode": block_mode,
+        "line_merge_tol": line_merge_tol,
+        "keep_merge_small_limit": keep_merge_small_limit,
+        "keep_merge_medium_limit": keep_merge_medium_limit,
+        "keep_merge_time_soft_ms": keep_merge_time_soft_ms,
+        "stream_min_bytes": int(float(stream_threshold_mb or 0) * 1024 * 1024),
+    }
+    rows = _FeatureColumns()
+    preloaded_docs = preloaded_docs or {}
+    workers = min(len(dxf_paths), max_workers or os.cpu_count() or 1)
+    if preloaded_docs:
+        workers = 1  # parsed docs live in this process; shipping them to workers costs more than a re-read
+    if workers <= 1:
+        for path in dxf_paths:
+            rows.extend(_convert_one_file(path, opts, say, preloaded_docs.get(path)))
+    else:
+        # files are independent: one process per file, results kept in input order
+        per_file: Dict[int, _FeatureColumns] = {}
+        try:
+            # spawn, not the Linux default fork: callers run this on a GUI pool thread, and
+            # forking a multi-threaded Qt process can deadlock the child
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as ex:
+                futs = {ex.submit(_convert_one_file_worker, path, opts): i for i, path in enumerate(dxf_paths)}
+                for fut in as_completed(futs):
+                    file_rows, msgs = fut.result()
+                    for m in msgs:
+                        say(m)
+                    per_file[futs[fut]] = file_rows
+        except Exception as ex:
+            say(f"[warn] parallel convert failed ({ex}); falling back to serial")
+            per_file = {i: _convert_one_file(path, opts, say) for i, path in enumerate(dxf_paths)}
+        for i in range(len(dxf_paths)):
+            if i in per_file:
+                rows.extend(per_file[i])
 
     if not rows:
         say("[convert] no rows")
         return {}
 
-    import geopandas as gpd
-    gdf = gpd.GeoDataFrame(rows, geometry="geometry", crs=f"EPSG:{source_epsg or 4326}")
+    gdf = rows.to_gdf(crs=f"EPSG:{source_epsg or 4326}")  # handlers only ever emit 2D coords
 
     if bbox_wgs84 and isinstance(bbox_wgs84, (list, tuple)) and len(bbox_wgs84) == 4:
         say(f"[convert] bbox filter: {bbox_wgs84}")
-        gdf4326 = gdf.to_crs(4326)
-        mask = gdf4326.intersects(box(*bbox_wgs84))
-        gdf = gdf.loc[mask].copy()
+        gdf4326 = _to_crs(gdf, 4326)
+        # STRtree query instead of a GEOS intersects call per row; sorted to keep row order
+        hits = gdf4326.sindex.query(box(*bbox_wgs84), predicate="intersects")
+        gdf = gdf.iloc[np.sort(hits)].copy()
         say(f"[convert] inside bbox: {len(gdf)}")
 
     if target_epsg and int(target_epsg) != 4326:
         say(f"[convert] reproject to EPSG:{int(target_epsg)}")
-        gdf = gdf.to_crs(epsg=int(target_epsg))
+        gdf = _to_crs(gdf, int(target_epsg))
 
+    # factorize (layer, geom) once and split a stable argsort; sort=True keeps groupby's key order
+    import pandas as pd
+    codes, uniques = pd.MultiIndex.from_arrays([gdf["layer"], gdf["geom"]]).factorize(sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order]) != 0) + 1
     out: Dict[Tuple[str, str], "gpd.GeoDataFrame"] = {}
-    for (layer, geom), sub in gdf.groupby(["layer", "geom"]):
-        say(f"[group] {layer} / {geom}: {len(sub)}")
-        out[(str(layer), str(geom))] = sub.reset_index(drop=True)
+    for idx in np.split(order, bounds) if len(order) else []:
+        layer, geom = uniques[codes[idx[0]]]
+        say(f"[group] {layer} / {geom}: {len(idx)}")
+        out[(str(layer), str(geom))] = gdf.iloc[idx].reset_index(drop=True)
     say(f"[convert] grouped buckets: {len(out)}")
     return out
 
@@ -568,6 +882,7 @@ def write_outputs(
     driver: str,
     overwrite: bool = False,
     on_progress: ProgressCB = None,
+    max_workers: Optional[int] = None,  # threads for Shapefile writes (GPKG stays single-writer)
 ):
     written = []
     import os
@@ -592,6 +907,18 @@ def write_outputs(
         except Exception as ex:
             say(f"[write:error] GeoPandas/Fiona required for GPKG: {ex}")
             return written
+        # pyogrio writes through GDAL directly (Arrow batches when pyarrow is present);
+        # without it fall back to gdf.to_file
+        try:
+            import pyogrio
+        except Exception:
+            pyogrio = None
+        try:
+            import pyarrow  # noqa
+            # pyogrio's Arrow write path needs GDAL >= 3.8
+            use_arrow = pyogrio is not None and tuple(pyogrio.__gdal_version__) >= (3, 8, 0)
+        except Exception:
+            use_arrow = False
         if overwrite and os.path.exists(gpkg):
             try: os.remove(gpkg)
             except: pass
@@ -601,7 +928,22 @@ def write_outputs(
                 gdf = _normalize_bucket_geoms((layer, geom), gdf)
                 if gdf.empty:
                     say(f"[write:skip] {layer}/{geom} empty after normalize"); continue
-                gdf.to_file(gpkg, layer=lname, driver="GPKG")
+                if pyogrio is not None:
+                    # GDAL names the GPKG geometry column "geom", which clashes with our "geom" field
+                    lopts = {"GEOMETRY_NAME": "geometry"}
+                    try:
+                        pyogrio.write_dataframe(gdf, gpkg, layer=lname, driver="GPKG", use_arrow=use_arrow,
+                                                layer_options=lopts)
+                    except Exception as ex:
+                        if not use_arrow:
+                            raise
+                        # Arrow path unsupported by this GDAL build: this layer and the rest go row-wise
+                        say(f"[write:warn] Arrow write failed ({ex}); retrying without Arrow")
+                        use_arrow = False
+                        pyogrio.write_dataframe(gdf, gpkg, layer=lname, driver="GPKG", use_arrow=False,
+                                                layer_options={**lopts, "OVERWRITE": "YES"})
+                else:
+                    gdf.to_file(gpkg, layer=lname, driver="GPKG")
                 written.append({"path": gpkg, "layer": lname, "count": int(len(gdf))})
                 say(f"[write] GPKG: {lname} ({len(gdf)}) → {gpkg}")
             except Exception as ex:
@@ -610,27 +952,48 @@ def write_outputs(
 
     # SHP (Fiona)
     os.makedirs(out_path, exist_ok=True)
-    ok_any = False
     errors = []
+    # each .shp is its own file and GDAL releases the GIL while writing, so layers go
+    # out on a thread pool; buckets whose sanitized names collide share one task
+    groups: Dict[str, list] = {}
     for (layer, geom), gdf in buckets.items():
         safe_layer = _sanitize_filename(layer)
         safe_geom = _sanitize_filename(geom)
         fpath = str(Path(out_path) / f"{safe_layer}_{safe_geom}.shp")
-        if overwrite:
-            for ext in (".shp",".shx",".dbf",".cpg",".prj",".qpj"):
-                try: os.remove(os.path.splitext(fpath)[0]+ext)
-                except: pass
-        try:
-            gdf = _normalize_bucket_geoms((layer, geom), gdf)
-            if gdf.empty:
-                say(f"[write:skip] {layer}/{geom} empty after normalize"); continue
-            gdf.to_file(fpath, driver="ESRI Shapefile")
-            written.append({"path": fpath, "layer": layer, "count": int(len(gdf))})
-            say(f"[write] SHP: {layer} ({len(gdf)}) → {fpath}")
-            ok_any = True
-        except Exception as ex:
-            errors.append((fpath, ex))
-            say(f"[write:warn] Fiona failed, will try pyshp/GeoJSON: {fpath} → {ex}")
+        groups.setdefault(fpath, []).append((layer, geom, gdf))
+
+    def _write_shp(fpath, items):
+        res = []
+        for layer, geom, gdf in items:
+            if overwrite:
+                for ext in (".shp",".shx",".dbf",".cpg",".prj",".qpj"):
+                    try: os.remove(os.path.splitext(fpath)[0]+ext)
+                    except: pass
+            try:
+                gdf = _normalize_bucket_geoms((layer, geom), gdf)
+                if gdf.empty:
+                    say(f"[write:skip] {layer}/{geom} empty after normalize"); continue
+                gdf.to_file(fpath, driver="ESRI Shapefile")
+                res.append(({"path": fpath, "layer": layer, "count": int(len(gdf))}, None))
+                say(f"[write] SHP: {layer} ({len(gdf)}) → {fpath}")
+            except Exception as ex:
+                res.append((None, (fpath, ex)))
+                say(f"[write:warn] Fiona failed, will try pyshp/GeoJSON: {fpath} → {ex}")
+        return res
+
+    workers = max(1, min(len(groups), max_workers or min(8, os.cpu_count() or 1)))
+    if workers == 1:
+        results = [_write_shp(f, items) for f, items in groups.items()]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(lambda kv: _write_shp(*kv), groups.items()))
+    for res in results:  # bucket order, whatever order the threads finished in
+        for entry, err in res:
+            if entry is not None:
+                written.append(entry)
+            else:
+                errors.append(err)
+    ok_any = bool(written)
 
     if ok_any:
         return written
@@ -692,19 +1055,24 @@ def write_outputs(
         safe_geom = _sanitize_filename(geom)
         fpath = str(Path(out_path) / f"{safe_layer}_{safe_geom}.geojson")
         try:
+            blocks = gdf["block_name"].tolist() if "block_name" in gdf.columns else None
             feats = []
-            for i, row in gdf.reset_index(drop=True).iterrows():
-                from shapely.geometry import mapping as shp_mapping2
+            for i, g in enumerate(gdf.geometry):
                 feat = {
                     "type":"Feature",
-                    "properties":{"FID":int(i),"layer":str(layer),"geom":str(geom)},
-                    "geometry": shp_mapping2(row.geometry),
+                    "properties":{"FID":i,"layer":str(layer),"geom":str(geom)},
+                    "geometry": shp_mapping(g),
                 }
-                if "block_name" in gdf.columns:
-                    feat["properties"]["block_name"] = str(row.get("block_name",""))
+                if blocks is not None:
+                    feat["properties"]["block_name"] = str(blocks[i])
                 feats.append(feat)
-            with open(fpath, "w", encoding="utf-8") as f:
-                import json; json.dump({"type":"FeatureCollection","features":feats}, f, ensure_ascii=False)
+            fc = {"type":"FeatureCollection","features":feats}
+            if orjson is not None:
+                with open(fpath, "wb") as f:
+                    f.write(orjson.dumps(fc))
+            else:
+                with open(fpath, "w", encoding="utf-8") as f:
+                    json.dump(fc, f, ensure_ascii=False)
             written.append({"path": fpath, "layer": layer, "count": int(len(feats))})
             say(f"[write] GeoJSON: {layer} ({len(feats)}) → {fpath}")
         except Exception as ex:
@@ -1,159 +1,353 @@
-from __future__ import annotations
-import os
-import tempfile
-import shutil
-import subprocess
-from typing import Optional, List
-
-# ---------- helpers ----------
-def _is_file(p: Optional[str]) -> bool:
-    return bool(p) and os.path.isfile(p)  # type: ignore[arg-type]
-
-def _which(cmd: str) -> Optional[str]:
-    # cross-platform 'which'
-    for path in os.environ.get("PATH", "").split(os.pathsep):
-        p = os.path.join(path.strip('"'), cmd)
-        if os.path.isfile(p):
-            return p
-        if os.name == "nt":
-            p_exe = p if p.lower().endswith(".exe") else p + ".exe"
-            if os.path.isfile(p_exe):
-                return p_exe
-    return None
-
-# ---------- ODA detection ----------
-def find_oda() -> Optional[str]:
-    # 1) explicit env
-    oda = os.environ.get("ODA_CONVERTER")
-    if _is_file(oda):
-        return os.path.abspath(oda)
-
-    # 2) PATH
-    for name in ("ODAFileConverter.exe", "ODAFileConverter_x64.exe", "ODAFileConverter"):
-        p = _which(name)
-        if _is_file(p):
-            return os.path.abspath(p)
-
-    # 3) common Windows install roots (best-effort)
-    if os.name == "nt":
-        roots = [
-            r"C:\Program Files\ODA",
-            r"C:\Program Files (x86)\ODA",
-            r"C:\Program Files\Open Design Alliance",
-            r"C:\Program Files (x86)\Open Design Alliance",
-        ]
-        for root in roots:
-            if os.path.isdir(root):
-                for base, _dirs, files in os.walk(root):
-                    for exe in ("ODAFileConverter.exe", "ODAFileConverter_x64.exe"):
-                        if exe in files:
-                            return os.path.abspath(os.path.join(base, exe))
-    return None
-
-# ---------- LibreDWG detection ----------
-def find_libredwg() -> Optional[str]:
-    for name in ("dwg2dxf", "dwg2dxf.exe"):
-        p = _which(name)
-        if _is_file(p):
-            return os.path.abspath(p)
-    return None
-
-# ---------- Convert via ODA ----------
-def convert_with_oda(dwg_path: str, out_dir: str, dxf_version: str = "ACAD2013") -> str:
-    exe = find_oda()
-    if not exe:
-        raise RuntimeError(
-            "ODA File Converter not found. Install it and set ODA_CONVERTER or add it to PATH."
-        )
-    in_folder = os.path.dirname(os.path.abspath(dwg_path)) or "."
-    out_folder = out_dir
-    in_filter = "*"
-    out_version = dxf_version
-    out_type = "DXF"
-    recurse = "0"
-
-    cmd = [
-        exe, in_folder, out_folder, in_filter, out_version, out_type, recurse,
-        os.path.abspath(dwg_path),
-    ]
-    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-    if res.returncode != 0:
-        raise RuntimeError(f"ODA converter failed (code {res.returncode}). Output:\n{res.stdout}")
-
-    # Expected file
-    base = os.path.splitext(os.path.basename(dwg_path))[0] + ".dxf"
-    out_path = os.path.join(out_folder, base)
-    if os.path.isfile(out_path):
-        return out_path
-
-    # Some ODA builds write into subfolders; search
-    found: List[str] = []
-    for b, _d, f in os.walk(out_folder):
-        for fn in f:
-            if fn.lower().endswith(".dxf") and os.path.splitext(fn)[0].lower() == os.path.splitext(base)[0].lower():
-                found.append(os.path.join(b, fn))
-    if not found:
-        for b, _d, f in os.walk(out_folder):
-            for fn in f:
-                if fn.lower().endswith(".dxf"):
-                    found.append(os.path.join(b, fn))
-    if not found:
-        raise RuntimeError("ODA conversion finished but no DXF was produced.")
-
-    if found[0] != out_path:
-        try:
-            shutil.move(found[0], out_path)
-        except Exception:
-            out_path = found[0]
-    return out_path
-
-# ---------- Convert via LibreDWG ----------
-def convert_with_libredwg(dwg_path: str, out_dir: str) -> str:
-    exe = find_libredwg()
-    if not exe:
-        raise RuntimeError("LibreDWG 'dwg2dxf' not found on PATH.")
-    out_path = os.path.join(out_dir, os.path.splitext(os.path.basename(dwg_path))[0] + ".dxf")
-    cmd = [exe, "-o", out_path, os.path.abspath(dwg_path)]
-    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-    if res.returncode != 0 or not os.path.isfile(out_path):
-        raise RuntimeError(f"dwg2dxf failed (code {res.returncode}). Output:\n{res.stdout}")
-    return out_path
-
-# ---------- Public API ----------
-def detect_dwg_converter() -> str:
-    """
-    Return a short label of available converter:
-      - 'oda' if ODA is found
-      - 'libredwg' if dwg2dxf is found
-      - '' if none
-    """
-    if find_oda():
-        return "oda"
-    if find_libredwg():
-        return "libredwg"
-    return ""
-
-def dwg_to_temp_dxf_auto(dwg_path: str, prefer: str = "auto", dxf_version: str = "ACAD2013") -> str:
-    """
-    Convert DWG to a temporary DXF using whichever converter is available.
-    prefer: 'auto' | 'oda' | 'libredwg'
-    Returns the temp DXF path. Caller may delete it later.
-    """
-    if not os.path.isfile(dwg_path):
-        raise FileNotFoundError(f"DWG not found: {dwg_path}")
-
-    tmpdir = tempfile.mkdtemp(prefix="dwg2dxf_")
-    try:
-        if prefer == "oda":
-            return convert_with_oda(dwg_path, tmpdir, dxf_version=dxf_version)
-        if prefer == "libredwg":
-            return convert_with_libredwg(dwg_path, tmpdir)
-
-        # auto: try ODA then LibreDWG
-        try:
-            return convert_with_oda(dwg_path, tmpdir, dxf_version=dxf_version)
-        except Exception:
-            return convert_with_libredwg(dwg_path, tmpdir)
-    except Exception:
-        shutil.rmtree(tmpdir, ignore_errors=True)
-        raise
+from __future__ import annotations
+import os
+import glob
+import atexit
+import tempfile
+import shutil
+import subprocess
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Optional, List, Tuple, Callable, Dict
+
+ProgressCB = Optional[Callable[[str], None]]
+
+# ---------- helpers ----------
+def _is_file(p: Optional[str]) -> bool:
+    return bool(p) and os.path.isfile(p)  # type: ignore[arg-type]
+
+@lru_cache(maxsize=128)
+def _which(cmd: str) -> Optional[str]:
+    # cross-platform 'which': one directory listing per PATH entry instead of a stat per candidate
+    nt = os.name == "nt"
+    cands = [cmd]
+    if nt and not cmd.lower().endswith(".exe"):
+        cands.append(cmd + ".exe")
+    if nt:
+        cands = [c.lower() for c in cands]  # Windows file names are case-insensitive
+    for path in os.environ.get("PATH", "").split(os.pathsep):
+        try:
+            with os.scandir(path.strip('"') or ".") as it:
+                found = {(e.name.lower() if nt else e.name): e for e in it}
+        except OSError:
+            continue
+        for c in cands:
+            e = found.get(c)
+            if e is not None and e.is_file():
+                return e.path
+    return None
+
+def _run_streaming(cmd: List[str], on_progress: ProgressCB = None,
+                   timeout: Optional[float] = None) -> Tuple[int, str]:
+    """
+    Run cmd, passing each output line to on_progress as it arrives.
+    Only the last 200 lines are kept for error messages; the process is killed
+    after `timeout` seconds. Returns (returncode, output tail).
+    """
+    tail: deque = deque(maxlen=200)
+    timed_out = threading.Event()
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          text=True, bufsize=1, errors="replace") as p:
+        def _kill():
+            timed_out.set()
+            p.kill()
+        timer = threading.Timer(timeout, _kill) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            for line in p.stdout:  # type: ignore[union-attr]
+                line = line.rstrip("\r\n")
+                tail.append(line)
+                if on_progress and line:
+                    try: on_progress(line)
+                    except Exception:
+                        pass
+            code = p.wait()
+        finally:
+            if timer:
+                timer.cancel()
+    if timed_out.is_set():
+        tail.append(f"[timeout] killed after {timeout}s")
+    return code, "\n".join(tail)
+
+# ---------- ODA detection ----------
+_ODA_EXES = ("ODAFileConverter.exe", "ODAFileConverter_x64.exe")
+
+# Detection results are memoized per process (call .cache_clear() to re-probe);
+# the convert_* functions re-check that a cached exe still exists.
+@lru_cache(maxsize=1)
+def find_oda() -> Optional[str]:
+    # 1) explicit env
+    oda = os.environ.get("ODA_CONVERTER")
+    if _is_file(oda):
+        return os.path.abspath(oda)
+
+    # 2) PATH
+    for name in ("ODAFileConverter.exe", "ODAFileConverter_x64.exe", "ODAFileConverter"):
+        p = _which(name)
+        if _is_file(p):
+            return os.path.abspath(p)
+
+    # 3) common Windows install roots (best-effort).
+    # Installs look like <root>\ODAFileConverter <ver>\ODAFileConverter.exe, so glob
+    # the root and one directory level instead of walking the whole tree.
+    if os.name == "nt":
+        roots = [
+            r"C:\Program Files\ODA",
+            r"C:\Program Files (x86)\ODA",
+            r"C:\Program Files\Open Design Alliance",
+            r"C:\Program Files (x86)\Open Design Alliance",
+        ]
+        for root in roots:
+            if not os.path.isdir(root):
+                continue
+            for sub in ("", "*"):
+                for exe in _ODA_EXES:
+                    for hit in glob.iglob(os.path.join(root, sub, exe)):
+                        if os.path.isfile(hit):
+                            return os.path.abspath(hit)
+    return None
+
+# ---------- LibreDWG detection ----------
+@lru_cache(maxsize=1)
+def find_libredwg() -> Optional[str]:
+    for name in ("dwg2dxf", "dwg2dxf.exe"):
+        p = _which(name)
+        if _is_file(p):
+            return os.path.abspath(p)
+    return None
+
+# ---------- Output lookup ----------
+def _iter_dxfs(folder: str):
+    """DXF files directly in folder, then one level down (ODA never nests deeper)."""
+    subdirs: List[str] = []
+    try:
+        with os.scandir(folder) as it:
+            for de in it:
+                if de.is_dir(follow_symlinks=False):
+                    subdirs.append(de.path)
+                elif de.name.lower().endswith(".dxf"):
+                    yield de.path
+    except OSError:
+        return
+    for d in subdirs:
+        try:
+            with os.scandir(d) as it:
+                for de in it:
+                    if de.name.lower().endswith(".dxf") and de.is_file():
+                        yield de.path
+        except OSError:
+            continue
+
+def _find_dxf(out_folder: str, stem: str) -> Optional[str]:
+    """First DXF named like stem (case-insensitive), else the first DXF at all."""
+    first = None
+    for path in _iter_dxfs(out_folder):
+        if os.path.splitext(os.path.basename(path))[0].lower() == stem.lower():
+            return path
+        if first is None:
+            first = path
+    return first
+
+# ---------- Convert via ODA ----------
+def convert_with_oda(dwg_path: str, out_dir: str, dxf_version: str = "ACAD2013",
+                     on_progress: ProgressCB = None, timeout: Optional[float] = None) -> str:
+    exe = find_oda()
+    if exe and not _is_file(exe):  # uninstalled since it was cached
+        _which.cache_clear(); find_oda.cache_clear()
+        exe = find_oda()
+    if not exe:
+        raise RuntimeError(
+            "ODA File Converter not found. Install it and set ODA_CONVERTER or add it to PATH."
+        )
+    in_folder = os.path.dirname(os.path.abspath(dwg_path)) or "."
+    out_folder = out_dir
+    in_filter = "*"
+    out_version = dxf_version
+    out_type = "DXF"
+    recurse = "0"
+
+    cmd = [
+        exe, in_folder, out_folder, in_filter, out_version, out_type, recurse,
+        os.path.abspath(dwg_path),
+    ]
+    code, output = _run_streaming(cmd, on_progress, timeout)
+    if code != 0:
+        raise RuntimeError(f"ODA converter failed (code {code}). Output:\n{output}")
+
+    # Expected file
+    base = os.path.splitext(os.path.basename(dwg_path))[0] + ".dxf"
+    out_path = os.path.join(out_folder, base)
+    if os.path.isfile(out_path):
+        return out_path
+
+    # Some ODA builds write into a subfolder; search
+    found = _find_dxf(out_folder, os.path.splitext(base)[0])
+    if not found:
+        raise RuntimeError("ODA conversion finished but no DXF was produced.")
+
+    if found != out_path:
+        try:
+            shutil.move(found, out_path)
+        except Exception:
+            out_path = found
+    return out_path
+
+def convert_many_with_oda(dwg_paths: List[str], out_dir: str, dxf_version: str = "ACAD2013",
+                          on_progress: ProgressCB = None, timeout: Optional[float] = None) -> List[str]:
+    """
+    Convert several DWGs with a single ODA run (folder mode), so the converter
+    starts once instead of once per file. Inputs are staged (hard link, else copy)
+    into one folder. Returns the DXF paths in input order.
+    """
+    exe = find_oda()
+    if exe and not _is_file(exe):  # uninstalled since it was cached
+        _which.cache_clear(); find_oda.cache_clear()
+        exe = find_oda()
+    if not exe:
+        raise RuntimeError(
+            "ODA File Converter not found. Install it and set ODA_CONVERTER or add it to PATH."
+        )
+    stage = tempfile.mkdtemp(prefix="oda_in_", dir=out_dir)
+    try:
+        stems: List[str] = []
+        seen = set()
+        for i, src in enumerate(dwg_paths):
+            name = os.path.basename(src)
+            if name.lower() in seen:  # same file name from different folders
+                name = f"{i}_{name}"
+            seen.add(name.lower())
+            dst = os.path.join(stage, name)
+            try:
+                os.link(src, dst)
+            except Exception:
+                shutil.copy2(src, dst)
+            stems.append(os.path.splitext(name)[0])
+
+        cmd = [exe, stage, out_dir, "*", dxf_version, "DXF", "0"]
+        code, output = _run_streaming(cmd, on_progress, timeout)
+        if code != 0:
+            raise RuntimeError(f"ODA converter failed (code {code}). Output:\n{output}")
+    finally:
+        shutil.rmtree(stage, ignore_errors=True)
+
+    # Expected files; some ODA builds write into a subfolder
+    by_stem = {}
+    for path in _iter_dxfs(out_dir):
+        by_stem.setdefault(os.path.splitext(os.path.basename(path))[0].lower(), path)
+    out: List[str] = []
+    for stem in stems:
+        out_path = os.path.join(out_dir, stem + ".dxf")
+        found = out_path if os.path.isfile(out_path) else by_stem.get(stem.lower())
+        if not found:
+            raise RuntimeError(f"ODA conversion finished but no DXF was produced for {stem}.")
+        out.append(found)
+    return out
+
+# ---------- Convert via LibreDWG ----------
+def convert_with_libredwg(dwg_path: str, out_dir: str,
+                          on_progress: ProgressCB = None, timeout: Optional[float] = None) -> str:
+    exe = find_libredwg()
+    if exe and not _is_file(exe):  # uninstalled since it was cached
+        _which.cache_clear(); find_libredwg.cache_clear()
+        exe = find_libredwg()
+    if not exe:
+        raise RuntimeError("LibreDWG 'dwg2dxf' not found on PATH.")
+    out_path = os.path.join(out_dir, os.path.splitext(os.path.basename(dwg_path))[0] + ".dxf")
+    cmd = [exe, "-o", out_path, os.path.abspath(dwg_path)]
+    code, output = _run_streaming(cmd, on_progress, timeout)
+    if code != 0 or not os.path.isfile(out_path):
+        raise RuntimeError(f"dwg2dxf failed (code {code}). Output:\n{output}")
+    return out_path
+
+# ---------- Session temp + DXF cache ----------
+# One temp folder per process (removed at exit); converted DXFs are remembered by
+# (abs DWG path, mtime, size, dxf_version) so repeated picks of the same DWG are free.
+_SESSION_TMP: Optional[str] = None
+_dxf_cache: Dict[Tuple[str, float, int, str], str] = {}
+
+def _session_tmp() -> str:
+    global _SESSION_TMP
+    if _SESSION_TMP is None or not os.path.isdir(_SESSION_TMP):
+        _SESSION_TMP = tempfile.mkdtemp(prefix="dwg2dxf_session_")
+        atexit.register(shutil.rmtree, _SESSION_TMP, ignore_errors=True)
+    return _SESSION_TMP
+
+# ---------- Public API ----------
+def detect_dwg_converter() -> str:
+    """
+    Return a short label of available converter:
+      - 'oda' if ODA is found
+      - 'libredwg' if dwg2dxf is found
+      - '' if none
+    """
+    if find_oda():
+        return "oda"
+    if find_libredwg():
+        return "libredwg"
+    return ""
+
+def dwg_to_temp_dxf_auto(dwg_path: str, prefer: str = "auto", dxf_version: str = "ACAD2013",
+                         on_progress: ProgressCB = None, timeout: Optional[float] = None) -> str:
+    """
+    Convert DWG to a temporary DXF using whichever converter is available.
+    prefer: 'auto' | 'oda' | 'libredwg'
+    on_progress receives converter output line by line; timeout (s) kills a hung converter.
+    Returns the temp DXF path. Caller may delete it later.
+    """
+    return dwgs_to_temp_dxfs_auto([dwg_path], prefer=prefer, dxf_version=dxf_version,
+                                  on_progress=on_progress, timeout=timeout)[0]
+
+def dwgs_to_temp_dxfs_auto(dwg_paths: List[str], prefer: str = "auto", dxf_version: str = "ACAD2013",
+                           on_progress: ProgressCB = None, timeout: Optional[float] = None) -> List[str]:
+    """
+    Convert several DWGs into one temporary folder; ODA handles them all in one run.
+    DXFs already produced this session for an unchanged DWG are reused.
+    Returns temp DXF paths in input order. Caller may delete them later.
+    """
+    keys = []
+    for p in dwg_paths:
+        if not os.path.isfile(p):
+            raise FileNotFoundError(f"DWG not found: {p}")
+        st = os.stat(p)
+        keys.append((os.path.abspath(p), st.st_mtime, st.st_size, dxf_version))
+
+    out: List[Optional[str]] = [None] * len(dwg_paths)
+    todo: List[int] = []
+    for i, key in enumerate(keys):
+        hit = _dxf_cache.get(key)
+        if hit and os.path.isfile(hit):
+            out[i] = hit
+        else:
+            todo.append(i)
+    if not todo:
+        return out  # type: ignore[return-value]
+    paths = [dwg_paths[i] for i in todo]
+
+    tmpdir = tempfile.mkdtemp(prefix="dwg2dxf_", dir=_session_tmp())
+    try:
+        def _oda():
+            if len(paths) == 1:
+                return [convert_with_oda(paths[0], tmpdir, dxf_version, on_progress, timeout)]
+            return convert_many_with_oda(paths, tmpdir, dxf_version, on_progress, timeout)
+
+        def _libredwg():
+            return [convert_with_libredwg(p, tmpdir, on_progress, timeout) for p in paths]
+
+        if prefer == "oda":
+            done = _oda()
+        elif prefer == "libredwg":
+            done = _libredwg()
+        else:
+            # auto: try ODA then LibreDWG
+            try:
+                done = _oda()
+            except Exception:
+                done = _libredwg()
+    except Exception:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+    for i, dxf in zip(todo, done):
+        _dxf_cache[keys[i]] = dxf
+        out[i] = dxf
+    return out  # type: ignore[return-value]
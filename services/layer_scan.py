@@ -0,0 +1,336 @@
+# dxf2gis_gui/services/layer_scan.py
+from __future__ import annotations
+import os
+import json
+import mmap
+import multiprocessing
+import tempfile
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Dict, Tuple, Any
+
+# Kept free of Qt / geopandas imports: scan worker processes import only this module
+# (and ezdxf), which keeps their startup cheap under the spawn start method.
+
+SCAN_SATURATION = 100_000  # entity walks stop after this many entities without a new layer
+LAYER_CACHE_MAX_AGE_S = 30 * 24 * 3600  # on-disk layer scan results older than this are dropped
+LAYER_CACHE_VERSION = 2  # part of every cache key: bumped when scan results change meaning
+
+
+# -------- Fast layer scan (ezdxf only) --------
+def _block_layers(doc, name: str, cache: Dict[str, Set[str]]) -> Set[str]:
+    # layers used inside a block definition, nested INSERTs included; memoized per block name
+    hit = cache.get(name)
+    if hit is not None:
+        return hit
+    out: Set[str] = set()
+    cache[name] = out  # registered before recursing so self-referencing blocks terminate
+    blk = doc.blocks.get(name)
+    if blk is not None:
+        for be in blk:
+            out.add(be.dxf.layer or "0")
+            if be.DXFTYPE == "INSERT":
+                out |= _block_layers(doc, be.dxf.name, cache)
+    return out
+
+def _walk_layers(entities, doc=None, saturation_cap: Optional[int] = SCAN_SATURATION) -> Set[str]:
+    # entity-by-entity layer walk; gives up once `saturation_cap` entities in a row added
+    # nothing new (None = walk everything). INSERTs pull in their block's layers when doc is given.
+    layers: Set[str] = set()
+    blocks: Dict[str, Set[str]] = {}
+    add = layers.add  # hot loop: keep attribute lookups out of it
+    stall = 0
+    for e in entities:
+        n = len(layers)
+        dxf = e.dxf
+        add(dxf.layer or "0")  # modelspace only holds graphic entities, which all have a layer
+        if doc is not None and e.DXFTYPE == "INSERT":  # class attribute: no method call per entity
+            # read the block definition instead of exploding the reference
+            layers |= _block_layers(doc, dxf.name, blocks)
+        if saturation_cap:
+            if len(layers) == n:
+                stall += 1
+                if stall >= saturation_cap:
+                    break
+            else:
+                stall = 0
+    return layers
+
+# section/block headers and sub-entities: none of them is listed by a layout walk
+_TAG_SKIP = frozenset((b"SECTION", b"BLOCK", b"ATTRIB", b"VERTEX", b"SEQEND"))
+# the only group codes the tag scan reads (entity start, name, layer, paperspace flag)
+_TAG_CODES = frozenset((b"0", b"2", b"8", b"67"))
+
+def _tag_scan_layers(path: str, deep: bool = False,
+                     saturation_cap: Optional[int] = SCAN_SATURATION) -> Set[str]:
+    """
+    _scan_one without building a document: one pass over the group-code stream.
+    Records LAYER table names, modelspace entity layers/INSERT names (paperspace skipped)
+    and per-block entity layers/INSERT names, then resolves blocks like _block_layers.
+    The file is memory-mapped and walked as bytes; only the names that are kept get decoded.
+    Raises for input it cannot read (e.g. binary DXF); callers fall back to ezdxf.
+    """
+    from ezdxf.filemanagement import dxf_file_info
+    encoding = dxf_file_info(path).encoding
+    table: Set[bytes] = set()
+    msp_layers: Set[bytes] = set()
+    msp_inserts: Set[bytes] = set()
+    blocks: Dict[str, Tuple[Set[bytes], Set[bytes]]] = {}  # BLOCK NAME → (entity layers, inserted names)
+    section = etype = b""
+    layer = insert = None
+    paper = False
+    block = None
+    stall = 0
+    with open(path, "rb") as fb, mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        head = mm[:4096]
+        if head.startswith(b"AutoCAD Binary DXF"):
+            raise ValueError("binary DXF")
+        if b"\n" not in head and b"\r" in head:
+            raise ValueError("CR-only line ends")  # lines are split on LF below
+        readline = mm.readline
+        for line in iter(readline, b""):
+            code = line.strip()
+            value = readline()
+            if code not in _TAG_CODES:
+                continue  # coordinates, flags, handles...: most tags, one set lookup each
+            value = value.rstrip(b"\r\n")
+            if code == b"0":
+                # the previous entity is complete: file it where it belongs
+                if etype not in _TAG_SKIP:
+                    if section == b"ENTITIES" and not paper:
+                        n = len(msp_layers)
+                        msp_layers.add(layer or b"0")
+                        if insert is not None:
+                            msp_inserts.add(insert)
+                        if deep and saturation_cap:
+                            stall = stall + 1 if len(msp_layers) == n else 0
+                            if stall >= saturation_cap:
+                                break
+                    elif block is not None:
+                        block[0].add(layer or b"0")
+                        if insert is not None:
+                            block[1].add(insert)
+                etype = value.strip()
+                layer = insert = None
+                paper = False
+                if etype == b"ENDSEC":
+                    section = b""
+                elif etype == b"ENDBLK":
+                    block = None
+            elif code == b"8":
+                if layer is None:
+                    layer = value
+            elif code == b"2":
+                if etype == b"SECTION":
+                    section = value.strip()
+                elif etype == b"INSERT":
+                    insert = value
+                elif etype == b"BLOCK" and section == b"BLOCKS":
+                    block = blocks.setdefault(value.decode(encoding, "surrogateescape").upper(), (set(), set()))
+                elif etype == b"LAYER" and section == b"TABLES":
+                    table.add(value)
+            elif code == b"67":
+                paper = value.strip() == b"1"
+
+    def _names(raw: Set[bytes]) -> Set[str]:
+        return {v.decode(encoding, "surrogateescape") for v in raw}
+
+    def _keys(raw: Set[bytes]) -> Set[str]:
+        return {v.decode(encoding, "surrogateescape").upper() for v in raw}
+
+    resolved: Dict[str, Set[str]] = {}
+
+    def _resolve(name: str) -> Set[str]:
+        hit = resolved.get(name)
+        if hit is not None:
+            return hit
+        out: Set[str] = set()
+        resolved[name] = out  # registered before recursing so self-referencing blocks terminate
+        entry = blocks.get(name)
+        if entry is not None:
+            out |= _names(entry[0])
+            for sub in _keys(entry[1]):
+                out |= _resolve(sub)
+        return out
+
+    # table mode still lists entity layers missing from the LAYER table (common in files from
+    # non-AutoCAD writers); ezdxf adds "0" and "Defpoints" on load if the file lacks them
+    layers = _names(msp_layers) if deep else _names(table) | _names(msp_layers) | {"0", "Defpoints"}
+    for name in _keys(msp_inserts):
+        layers |= _resolve(name)
+    return layers
+
+def _read_doc(path: str):
+    # same as conversion_service.load_doc, kept local: importing that module would pull
+    # numpy / shapely / the numba kernels into every scan worker
+    import ezdxf
+    try:
+        return ezdxf.readfile(path)
+    except ezdxf.DXFStructureError:
+        from ezdxf import recover
+        doc, _auditor = recover.readfile(path)
+        return doc
+
+def _scan_one(path: str, doc=None, deep: bool = False,
+              saturation_cap: Optional[int] = SCAN_SATURATION) -> Set[str]:
+    # top-level so it can run in a worker process
+    if doc is None:
+        # no parsed doc: read the tags directly instead of building the whole entity database
+        try:
+            return _tag_scan_layers(path, deep, saturation_cap)
+        except Exception:
+            pass  # e.g. binary DXF: load it normally
+        doc = _read_doc(path)
+    msp = doc.modelspace()
+    layers: Set[str] = set()
+    blocks: Dict[str, Set[str]] = {}
+    if not deep:
+        # same set as the tag scan: table names plus every modelspace entity layer (ezdxf
+        # does not add table entries for those) and the layers of INSERTed blocks
+        layers.update(l.dxf.name for l in doc.layers)
+        inserts: Set[str] = set()
+        for e in msp:
+            layers.add(e.dxf.layer or "0")
+            if e.DXFTYPE == "INSERT":
+                inserts.add(e.dxf.name)
+        for bname in inserts:
+            layers |= _block_layers(doc, bname, blocks)
+        return layers
+    return _walk_layers(msp, doc, saturation_cap)
+
+# -------- On-disk cache of per-file scan results --------
+def _layer_cache_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "cad2gis", "layers.json")
+
+def _layer_cache_key(path: str, deep: bool = False,
+                     saturation_cap: Optional[int] = SCAN_SATURATION) -> Optional[str]:
+    # any edit to the file changes mtime/size; scan options are part of the key too
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (f"v{LAYER_CACHE_VERSION}:{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}"
+            f":{int(deep)}:{saturation_cap}")
+
+def _load_layer_cache() -> Dict[str, Any]:
+    # {key: {"t": saved_at, "layers": [...]}}; unreadable cache = empty cache
+    try:
+        with open(_layer_cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    cutoff = time.time() - LAYER_CACHE_MAX_AGE_S
+    return {k: v for k, v in data.items()
+            if isinstance(v, dict) and isinstance(v.get("layers"), list)
+            and isinstance(v.get("t"), (int, float)) and v["t"] >= cutoff}
+
+@contextmanager
+def _layer_cache_lock(path: str):
+    # advisory lock around read-merge-write of the shared cache file (other scans, other
+    # app instances); best effort: without it the atomic replace still keeps the file whole
+    f = open(f"{path}.lock", "a+b")
+    locked = False
+    try:
+        try:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            locked = True
+        except OSError:
+            pass
+        yield
+    finally:
+        if locked and os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        f.close()  # releases the flock
+
+def _save_layer_cache(entries: Dict[str, Any]) -> None:
+    # merges into the file as it is now, not as it was when the scan started, so entries
+    # saved meanwhile by another scan are kept
+    path = _layer_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _layer_cache_lock(path):
+            cache = _load_layer_cache()
+            cache.update(entries)
+            fd, tmp = tempfile.mkstemp(prefix="layers.", suffix=".tmp", dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(cache, f, ensure_ascii=False)
+                os.replace(tmp, path)  # readers never see a half-written file
+            except Exception:
+                os.remove(tmp)
+                raise
+    except Exception:
+        pass  # caching is best effort
+
+def fast_scan_layers(dxf_paths: List[str], docs: Optional[Dict[str, Any]] = None, deep: bool = False,
+                     saturation_cap: Optional[int] = SCAN_SATURATION, use_cache: bool = True,
+                     rescan: bool = False) -> List[str]:
+    """
+    Layer names from the LAYER table plus layers used inside INSERTed blocks.
+    docs: optional path → already parsed ezdxf Drawing (skips re-reading those files).
+    deep=True walks every modelspace entity (and the blocks INSERTs reference) instead.
+    deep entity walks stop after saturation_cap entities in a row bring no new layer;
+    pass None for an exact enumeration.
+    Files without a parsed doc are tag-scanned (no document is built) in parallel worker processes.
+    use_cache: reuse per-file results from the on-disk cache while the file is unchanged.
+    rescan: scan every file even if cached, and store the new results.
+    """
+    docs = docs or {}
+    layers: Set[str] = set()
+    paths = list(dict.fromkeys(dxf_paths))  # each file once, input order kept
+    cache = _load_layer_cache() if use_cache else {}
+    keys = {p: _layer_cache_key(p, deep, saturation_cap) for p in paths} if use_cache else {}
+    hits = {} if rescan else cache
+    for path in paths:
+        hit = hits.get(keys.get(path))
+        if hit is not None:
+            layers.update(hit["layers"])
+    paths = [p for p in paths if keys.get(p) not in hits]
+    fresh: Dict[str, Set[str]] = {}
+    todo = [p for p in paths if p not in docs]
+    ex = None
+    futures = []
+    if len(todo) > 1:
+        try:
+            # spawn, not the Linux default fork: this runs on a GUI pool thread, and forking a
+            # multi-threaded Qt process can deadlock the child
+            ex = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(todo)),
+                                     mp_context=multiprocessing.get_context("spawn"))
+            futures = [ex.submit(_scan_one, p, None, deep, saturation_cap) for p in todo]
+        except Exception:
+            ex = None  # fall back to scanning in this thread
+    try:
+        # already parsed docs are scanned here while the workers parse the rest
+        for path in paths:
+            if path in docs:
+                fresh[path] = _scan_one(path, docs[path], deep, saturation_cap)
+        if ex is not None:
+            try:
+                for path, fut in zip(todo, futures):
+                    fresh[path] = fut.result()
+                todo = []
+            except Exception:
+                pass  # e.g. broken pool: redo those files in this thread
+    finally:
+        if ex is not None:
+            ex.shutdown(cancel_futures=True)
+    for path in todo:
+        fresh[path] = _scan_one(path, None, deep, saturation_cap)
+    for found in fresh.values():
+        layers |= found
+    if use_cache and fresh:
+        now = time.time()
+        _save_layer_cache({keys[path]: {"t": now, "layers": sorted(found)}
+                           for path, found in fresh.items() if keys.get(path) is not None})
+    return sorted(layers)
@@ -1,115 +1,232 @@
 # dxf2gis_gui/ui/main_window.py
 from __future__ import annotations
 import os
+import inspect
+import json
 import pathlib
+import threading
 import time
-import json
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import partial
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Set, Dict, Tuple, Any
 
-from PySide6.QtCore import Qt, QThread, Signal
+import numpy as np
+
+# orjson is optional: faster, more compact GeoJSON encoding for the map; stdlib json otherwise
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+from PySide6.QtCore import Qt, QObject, QTimer, Signal
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QFileDialog, QMessageBox,
-    QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem,
-    QLineEdit, QGroupBox, QCheckBox, QComboBox, QProgressBar, QDoubleSpinBox
+    QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget,
+    QLineEdit, QGroupBox, QCheckBox, QComboBox, QProgressBar, QDoubleSpinBox,
+    QPlainTextEdit
 )
 
-from services.conversion_service import precise_convert, write_outputs
-import ezdxf
+from services.layer_scan import fast_scan_layers
 
 # Optional DWG support (external converters only; optional)
-from services.dwg_support import dwg_to_temp_dxf_auto, detect_dwg_converter
-
-# Map widget (Leaflet in QWebEngine)
-from ui.map_view import MapView
-
-
-# -------- Fast layer scan (ezdxf only) --------
-def fast_scan_layers(dxf_paths: List[str]) -> List[str]:
-    layers: Set[str] = set()
-    for path in dxf_paths:
-        doc = ezdxf.readfile(path)
-        msp = doc.modelspace()
-        for e in msp:
-            layer = getattr(e.dxf, "layer", "0") or "0"
-            layers.add(layer)
-            if e.dxftype() == "INSERT":
-                try:
-                    k = 0
-                    for se in e.virtual_entities():
-                        sl = getattr(se.dxf, "layer", "0") or "0"
-                        layers.add(sl)
-                        k += 1
-                        if k >= 20:
-                            break
-                except Exception:
-                    pass
-    return sorted(layers)
+from services.dwg_support import dwgs_to_temp_dxfs_auto, detect_dwg_converter
+
+DWG_TIMEOUT_S = 600  # kill a hung DWG converter after this many seconds
+STATUS_MSG_MS = 5000  # how long result messages stay in the status bar
+LOG_FLUSH_MS = 100  # progress lines from workers reach the log view at most this often
+LOG_MAX_LINES = 5000  # the log view drops its oldest lines past this
+DOC_CACHE_MAX = 4  # parsed drawings kept between actions (least recently used dropped first)
+LARGE_INPUT_BYTES = 100 * 1024 * 1024  # Analyze notes inputs above this as slow to read
 
 
-# -------- Simple QThread subclass to run a function --------
-class TaskThread(QThread):
+# -------- Pooled worker to run a function --------
+class WorkerSignals(QObject):
     finished = Signal(object)  # result payload
     error = Signal(str)
+    progress = Signal(object)  # items yielded by a generator fn
+
 
+@dataclass(frozen=True)
+class ConvertParams:
+    """Form settings for a preview/convert run, read once on the GUI thread; workers only see this copy."""
+    source_epsg: int
+    target_epsg: Optional[int]
+    block_mode: str  # 'keep-merge' | 'explode'
+    line_merge_tol: float
+    target_layers: Optional[Tuple[str, ...]]  # None => all
+    driver: str = "ESRI Shapefile"
+    overwrite: bool = False
+
+
+class Worker:
+    # runs on a Python-owned pool thread: Qt pool threads get a fresh Python thread state
+    # per run, which frees pyproj's per-thread PROJ context while PROJ still points at it
     def __init__(self, fn):
-        super().__init__()
         self._fn = fn
+        self.signals = WorkerSignals()
 
     def run(self):
         try:
             res = self._fn()
-            self.finished.emit(res)
+            if inspect.isgenerator(res):
+                # stream each yielded item; the generator's return value is the result
+                gen = res
+                while True:
+                    try:
+                        item = next(gen)
+                    except StopIteration as stop:
+                        res = stop.value
+                        break
+                    self.signals.progress.emit(item)
+            self.signals.finished.emit(res)
         except Exception as ex:
             import traceback
             tb = traceback.format_exc()
-            self.error.emit(f"{ex}\n--- TRACEBACK ---\n{tb}")
+            self.signals.error.emit(f"{ex}\n--- TRACEBACK ---\n{tb}")
 
 
 # -------- helpers for bbox from GeoJSON dict --------
-def _minmax_bbox_of_coords(coords: Any, cur: Optional[Tuple[float,float,float,float]]) -> Tuple[float,float,float,float]:
-    # coords is nested lists of [lon,lat,(z)]
-    s, w, n, e = cur if cur else (  90.0,  180.0, -90.0, -180.0)
-    if isinstance(coords, (list, tuple)):
-        if len(coords) >= 2 and isinstance(coords[0], (int,float)) and isinstance(coords[1], (int,float)):
-            lon = float(coords[0]); lat = float(coords[1])
-            if lat < s: s = lat
-            if lat > n: n = lat
-            if lon < w: w = lon
-            if lon > e: e = lon
+def _collect_xy(coords: Any, xs: "array", ys: "array") -> None:
+    # coords is nested lists of [lon,lat,(z)]; iterative walk, positions land in xs/ys
+    stack = [coords]
+    pop, push = stack.pop, stack.extend
+    while stack:
+        c = pop()
+        if not isinstance(c, (list, tuple)):
+            continue
+        if len(c) >= 2 and isinstance(c[0], (int,float)) and isinstance(c[1], (int,float)):
+            xs.append(c[0]); ys.append(c[1])
         else:
-            for c in coords:
-                s, w, n, e = _minmax_bbox_of_coords(c, (s,w,n,e))
-    return (s, w, n, e)
+            push(c)
 
-def compute_geojson_dict_bbox(layers: Dict[str, Any]) -> Optional[Tuple[float,float,float,float]]:
-    bbox: Optional[Tuple[float,float,float,float]] = None
-    for _name, fc in layers.items():
+def _fc_bbox(fcs) -> Optional[Tuple[float,float,float,float]]:
+    # one (south, west, north, east) over all FeatureCollections; min/max run in numpy
+    xs, ys = array("d"), array("d")
+    for fc in fcs:
         if not isinstance(fc, dict):
             continue
-        feats = fc.get("features") or []
-        for f in feats:
-            geom = (f or {}).get("geometry") or {}
-            coords = geom.get("coordinates")
-            if coords is None:
-                continue
-            bbox = _minmax_bbox_of_coords(coords, bbox)
-    return bbox
+        fb = fc.get("bbox")
+        if isinstance(fb, (list, tuple)) and len(fb) == 4:
+            # RFC 7946 bbox member [west, south, east, north]: two corners stand in for every vertex
+            xs.extend((fb[0], fb[2])); ys.extend((fb[1], fb[3]))
+            continue
+        for f in fc.get("features") or []:
+            coords = ((f or {}).get("geometry") or {}).get("coordinates")
+            if coords is not None:
+                _collect_xy(coords, xs, ys)
+    if not xs:
+        return None
+    lon = np.frombuffer(xs, dtype=np.float64)
+    lat = np.frombuffer(ys, dtype=np.float64)
+    return (float(lat.min()), float(lon.min()), float(lat.max()), float(lon.max()))
 
-def compute_geojson_bbox_for_selection(layers: Dict[str, Any], selected_layer_names: Optional[List[str]]) -> Optional[Tuple[float,float,float,float]]:
+def compute_geojson_dict_bbox(layers: Dict[str, Any]) -> Optional[Tuple[float,float,float,float]]:
+    return _fc_bbox(layers.values())
+
+def _merge_bbox(a: Optional[Tuple[float,float,float,float]],
+                b: Optional[Tuple[float,float,float,float]]) -> Optional[Tuple[float,float,float,float]]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def compute_geojson_bbox_for_selection(layers: Dict[str, Any], selected_layer_names: Optional[List[str]],
+                                       layer_bboxes: Optional[Dict[str, Tuple[float,float,float,float]]] = None,
+                                       key_index: Optional[Dict[str, List[str]]] = None
+                                       ) -> Optional[Tuple[float,float,float,float]]:
     """selected_layer_names are raw layer names (without ' (GEOM)').
-       We include any payload key that startswith '<name> (' """
+       We include any payload key that startswith '<name> ('
+       layer_bboxes: cached per-key bboxes; only keys missing from it are walked.
+       key_index: raw layer name → its payload keys; saves splitting every key."""
     if not layers:
         return None
     if not selected_layer_names:
-        return compute_geojson_dict_bbox(layers)
-    keys: List[str] = []
-    sel_set = set(selected_layer_names)
-    for key in layers.keys():
-        base = key.split(" (", 1)[0]
-        if base in sel_set:
-            keys.append(key)
-    subset = {k: layers[k] for k in keys}
-    return compute_geojson_dict_bbox(subset)
+        keys = list(layers)
+    elif key_index is not None:
+        keys = [k for name in selected_layer_names for k in key_index.get(name, ()) if k in layers]
+    else:
+        sel_set = set(selected_layer_names)
+        keys = [k for k in layers if k.split(" (", 1)[0] in sel_set]
+    cached = layer_bboxes or {}
+    bbox = None
+    uncached = []
+    for key in keys:
+        fc = layers[key]
+        if key in cached:
+            bbox = _merge_bbox(bbox, cached[key])
+        else:
+            uncached.append(fc)
+    if uncached:
+        bbox = _merge_bbox(bbox, _fc_bbox(uncached))
+    return bbox
+
+
+# -------- preview bucket → GeoJSON (runs on a thread pool) --------
+PREVIEW_MAX_FEAT = 20000  # features shown per layer in the map preview
+
+def _fmt_size(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def _dumps(obj: Any):
+    # compact JSON for the map page: bytes from orjson (numpy scalars/arrays included), str from json
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def _feature_collection(gdf) -> Dict[str, Any]:
+    # GeoJSON dict built column-wise: one tolist() per attribute column and the geometries'
+    # own __geo_interface__, without GeoPandas' per-row iteration and per-feature bboxes
+    gcol = gdf.geometry.name
+    cols = [c for c in gdf.columns if c != gcol]
+    vals = []
+    for c in cols:
+        col = gdf[c]
+        if col.hasnans:
+            col = col.astype(object).where(col.notna(), None)  # NaN is not valid JSON
+        vals.append(col.tolist())
+    feats = [
+        {"id": str(i), "type": "Feature", "properties": dict(zip(cols, row)),
+         "geometry": g.__geo_interface__ if g is not None else None}
+        for i, (g, *row) in enumerate(zip(gdf.geometry.values, *vals))
+    ]
+    return {"type": "FeatureCollection", "features": feats}
+
+def _bucket_to_geojson(item, reproject: bool = True) -> Optional[Tuple[str, Optional[Tuple[float,float,float,float]], Any]]:
+    # (key, bbox, gj_json) for one (layer, geom) bucket, or None if there is nothing
+    # to draw; PROJ and shapely release the GIL, so buckets convert in parallel threads.
+    # gj_json is the compact JSON text for the map, encoded here so the UI thread never does.
+    # reproject=False: the caller knows the data is already EPSG:4326
+    (layer, geom), gdf = item
+    if gdf.empty:
+        return None
+    # cap first so to_crs only transforms features that are actually shown (head() is a slice, not a copy)
+    gdf = gdf.head(PREVIEW_MAX_FEAT)
+    if reproject and gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(4326)
+    # bbox in WGS84 for auto-zoom, straight from the geometry array (no coordinate walk);
+    # also kept on the collection as the RFC 7946 member
+    minx, miny, maxx, maxy = gdf.total_bounds
+    lb = (float(miny), float(minx), float(maxy), float(maxx)) if np.isfinite(minx) else None
+    try:
+        # plain dicts straight from the geometries; no JSON string round-trip
+        gj_obj = _feature_collection(gdf)
+    except Exception:
+        return None
+    key = f"{layer} ({geom})"
+    if lb is not None:
+        gj_obj["bbox"] = [lb[1], lb[0], lb[3], lb[2]]  # [west, south, east, north]
+    # only the encoded text leaves this function: the dict is dropped here instead of
+    # living on in the UI next to its JSON
+    return key, lb, _dumps(gj_obj)
 
 
 # -------- Main Window (DXF-first; optional DWG via external converter) --------
@@ -122,17 +239,23 @@ class MainWindow(QMainWindow):
         self._files: List[str] = []
         self._busy: bool = False
         self._temp_files: List[str] = []  # track temp DXFs generated from DWG
-        self._threads: List[QThread] = []  # keep references to running threads
-        self._last_map_payload: Dict[str, Any] = {}  # store last shown GeoJSON dict
-
-        # Detect optional DWG converter
-        self._dwg_converter = detect_dwg_converter()  # 'oda' | 'libredwg' | ''
-        if self._dwg_converter == "oda":
-            self._dwg_label = "ODA File Converter detected"
-        elif self._dwg_converter == "libredwg":
-            self._dwg_label = "LibreDWG (dwg2dxf) detected"
-        else:
-            self._dwg_label = "No DWG converter found (DXF only)"
+        # reused worker threads for all actions
+        self._pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                        thread_name_prefix="dxf2gis-worker")
+        self._workers: Set[WorkerSignals] = set()  # signal emitters of queued/running workers
+        # shown layer key → its WGS84 (s, w, n, e) bbox, or None if empty; all "Zoom to selection" needs
+        self._layer_bboxes: Dict[str, Optional[Tuple[float,float,float,float]]] = {}
+        self._payload_index: Dict[str, List[str]] = {}  # raw layer name → payload keys "<layer> (<GEOM>)"
+        # path → (mtime_ns, size, ezdxf Drawing), LRU order; used from pool threads, so every
+        # access holds _doc_lock, and a per-path lock keeps two actions from parsing one file twice
+        self._doc_cache: OrderedDict[str, Tuple[int, int, Any]] = OrderedDict()
+        self._doc_lock = threading.Lock()
+        self._doc_parse_locks: Dict[str, threading.Lock] = {}
+        self._file_meta: Dict[str, Tuple[int, int]] = {}  # input path → (size, mtime_ns) when picked
+
+        # Optional DWG converter: detected off the UI thread right after startup
+        self._dwg_converter = ""  # 'oda' | 'libredwg' | ''
+        self._dwg_label = "Detecting DWG converter…"
 
         root = QWidget(self)
         self.setCentralWidget(root)
@@ -202,8 +325,7 @@ class MainWindow(QMainWindow):
         self.chkEnableDWG = QCheckBox("Enable DWG (if available)")
         self.chkEnableDWG.setChecked(False)  # default OFF to keep zero-install DXF-only
         self.chkEnableDWG.setToolTip(self._dwg_label)
-        if not self._dwg_converter:
-            self.chkEnableDWG.setEnabled(False)
+        self.chkEnableDWG.setEnabled(False)  # until detection finds a converter
         parmRow2.addWidget(self.chkEnableDWG)
 
         parmRow2.addStretch(1)
@@ -228,6 +350,13 @@ class MainWindow(QMainWindow):
 
         self.lstLayers = QListWidget()
         self.lstLayers.setSelectionMode(QListWidget.ExtendedSelection)
+        self._selected_layer_set: Set[str] = set()  # shadow of the list selection, kept by deltas
+        self.lstLayers.selectionModel().selectionChanged.connect(self._on_layer_selection_changed)
+        # selection-driven zoom is debounced: a burst of (shift-)clicks costs one bbox union
+        self._zoom_timer = QTimer(self)
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.setInterval(120)
+        self._zoom_timer.timeout.connect(self._recompute_zoom)
         layerL.addWidget(self.lstLayers, 1)
         left.addWidget(layerBox, 3)
 
@@ -237,6 +366,7 @@ class MainWindow(QMainWindow):
         self.btnShowMap = QPushButton("Show in Map")
         self.btnZoomSel = QPushButton("Zoom to selection")
         self.btnConvert = QPushButton("Convert")
+        self.btnAnalyze.setToolTip("Shift+click: rescan the files, ignoring cached layer lists")
         self.btnAnalyze.clicked.connect(self.do_analyze)
         self.btnShowMap.clicked.connect(self.do_show_in_map)
         self.btnZoomSel.clicked.connect(self.do_zoom_selection)
@@ -255,54 +385,251 @@ class MainWindow(QMainWindow):
         prgRow.addWidget(self.prog)
         left.addLayout(prgRow)
 
+        # --- Log (plain text; filled in batches by _flush_log) ---
+        logBox = QGroupBox("Log")
+        logL = QVBoxLayout(logBox)
+        self.logView = QPlainTextEdit()
+        self.logView.setReadOnly(True)
+        self.logView.setMaximumBlockCount(LOG_MAX_LINES)
+        logL.addWidget(self.logView)
+        left.addWidget(logBox, 1)
+
         # ===== Right: map (Leaflet) =====
-        self.map = MapView(self)
-        main.addWidget(self.map, 5)
-        self.map.load_empty()
+        # the MapView is built on demand (see `map`), at the latest once input is picked:
+        # QtWebEngine and its renderer process are not started at launch
+        self._map = None
+        self._map_error: Optional[str] = None  # set once if the MapView cannot be created
+        self._mapHost = QWidget()
+        mapL = QVBoxLayout(self._mapHost)
+        mapL.setContentsMargins(0, 0, 0, 0)
+        self._mapHint = QLabel("The map opens once CAD input is chosen.")
+        self._mapHint.setAlignment(Qt.AlignCenter)
+        mapL.addWidget(self._mapHint)
+        main.addWidget(self._mapHost, 5)
+
+        # progress lines from worker threads: appended to a bounded deque (never blocks the
+        # worker, no signal per line) and shown by a GUI-thread timer while an action runs
+        self._log_q: deque = deque(maxlen=4096)
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(LOG_FLUSH_MS)
+        self._log_timer.timeout.connect(self._flush_log)
+
+        # warm the find_oda/find_libredwg caches before the first DWG pick needs them
+        QTimer.singleShot(0, self._start_dwg_detection)
+
+    def _log(self, msg: str):
+        self._log_q.append(msg)  # thread-safe; the oldest lines drop if the GUI falls behind
+
+    def _flush_log(self):
+        if not self._log_q:
+            return
+        batch = []
+        while self._log_q:  # popleft, not iteration: workers may append meanwhile
+            batch.append(str(self._log_q.popleft()))
+        # one append per tick instead of one per line: a single layout pass for the whole batch
+        self.logView.appendPlainText("\n".join(batch))
+        self.statusBar().showMessage(batch[-1])  # one line fits: only the newest is shown
+
+    def _status(self, msg: str):
+        # results go to the status bar; modal boxes are kept for errors and required user steps
+        self.statusBar().showMessage(msg, STATUS_MSG_MS)
+        self.logView.appendPlainText(msg)
 
     # -------- thread helper --------
-    def _run_in_thread(self, fn, on_finished, on_error):
-        th = TaskThread(fn)
-        self._threads.append(th)
+    def _run_in_thread(self, fn, on_finished, on_error, on_progress=None):
+        # the signal emitter is kept alive here until the result has been delivered;
+        # emits come from pool threads, so every connection is queued explicitly: slots always
+        # run in the GUI thread, in emit order (progress items before the result)
+        wk = Worker(fn)
+        sig = wk.signals
+        if on_progress is not None:
+            sig.progress.connect(on_progress, Qt.QueuedConnection)
+        self._workers.add(sig)
         def _fin(res):
             try:
-                on_finished(th, res)
+                on_finished(sig, res)
             finally:
-                if th in self._threads:
-                    self._threads.remove(th)
-                th.deleteLater()
+                self._workers.discard(sig)
         def _err(msg):
             try:
-                on_error(th, msg)
+                on_error(sig, msg)
             finally:
-                if th in self._threads:
-                    self._threads.remove(th)
-                th.deleteLater()
-        th.finished.connect(_fin)
-        th.error.connect(_err)
-        th.start()
-        return th
+                self._workers.discard(sig)
+        sig.finished.connect(_fin, Qt.QueuedConnection)
+        sig.error.connect(_err, Qt.QueuedConnection)
+        self._pool.submit(wk.run)
+        return sig
+
+    def _start_dwg_detection(self):
+        def _done(_wk, kind):
+            self._dwg_converter = kind or ""
+            if self._dwg_converter == "oda":
+                self._dwg_label = "ODA File Converter detected"
+            elif self._dwg_converter == "libredwg":
+                self._dwg_label = "LibreDWG (dwg2dxf) detected"
+            else:
+                self._dwg_label = "No DWG converter found (DXF only)"
+            self.chkEnableDWG.setToolTip(self._dwg_label)
+            self.chkEnableDWG.setEnabled(bool(self._dwg_converter) and not self._busy)
+
+        def _fail(_wk, msg):
+            self._dwg_label = "No DWG converter found (DXF only)"
+            self.chkEnableDWG.setToolTip(self._dwg_label)
+
+        self._run_in_thread(detect_dwg_converter, _done, _fail)
 
     # -------- helpers --------
     def _set_busy(self, busy: bool):
         self._busy = busy
+        if busy:
+            self._log_q.clear()
+            self._log_timer.start()
+        else:
+            self._log_timer.stop()
+            self._flush_log()  # last lines before any result message replaces them
         self.prog.setVisible(busy)
         for w in (self.btnAnalyze, self.btnConvert, self.btnPick, self.btnOut,
-                  self.btnSelAll, self.btnClear, self.btnShowMap, self.btnZoomSel, self.chkEnableDWG):
+                  self.btnSelAll, self.btnClear):
             w.setEnabled(not busy)
+        for w in (self.btnShowMap, self.btnZoomSel):
+            w.setEnabled(not busy and self._map_error is None)
+        self.chkEnableDWG.setEnabled(not busy and bool(self._dwg_converter))
+
+    @property
+    def map(self):
+        return self._ensure_map()
+
+    def _ensure_map(self):
+        # None if QtWebEngine is unavailable: the map actions are disabled, the rest works
+        if self._map is None and self._map_error is None:
+            view = None
+            try:
+                from ui.map_view import MapView  # Leaflet in QWebEngine; see the note in __init__
+                view = MapView(self._mapHost)
+                self._mapHost.layout().addWidget(view)
+                view.load_empty()
+            except Exception as ex:
+                if view is not None:
+                    view.deleteLater()
+                self._map_error = str(ex) or type(ex).__name__
+                self._mapHint.setText(f"Map unavailable (QtWebEngine failed to start):\n{self._map_error}")
+                self.btnShowMap.setEnabled(False)
+                self.btnZoomSel.setEnabled(False)
+                self.logView.appendPlainText(f"[map] unavailable: {self._map_error}")
+                return None
+            self._map = view
+            self._mapHint.hide()
+        return self._map
+
+    def _peek_doc(self, path: str):
+        """Cached parsed DXF for path if the file is unchanged since it was parsed, else None."""
+        st = os.stat(path)
+        with self._doc_lock:
+            hit = self._doc_cache.get(path)
+            if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                self._doc_cache.move_to_end(path)
+                return hit[2]
+        return None
+
+    def _get_doc(self, path: str):
+        """Parsed DXF for path, reused across Analyze / Show / Convert while the file is unchanged."""
+        with self._doc_lock:
+            parse_lock = self._doc_parse_locks.setdefault(path, threading.Lock())
+        with parse_lock:  # a second caller waits for this parse instead of repeating it
+            doc = self._peek_doc(path)
+            if doc is not None:
+                return doc
+            from services.conversion_service import load_doc  # ezdxf/shapely/numba: first use only
+            st = os.stat(path)
+            doc = load_doc(path)
+            with self._doc_lock:
+                self._doc_cache[path] = (st.st_mtime_ns, st.st_size, doc)
+                self._doc_cache.move_to_end(path)
+                while len(self._doc_cache) > DOC_CACHE_MAX:
+                    self._doc_cache.popitem(last=False)
+        return doc
+
+    def _clear_docs(self):
+        with self._doc_lock:
+            self._doc_cache.clear()
+            self._doc_parse_locks.clear()  # a parse in flight keeps its own reference
+
+    def _get_docs(self, paths: List[str]) -> Dict[str, Any]:
+        return {p: self._get_doc(p) for p in paths}
+
+    def _docs_for_run(self, files: Tuple[str, ...]) -> Dict[str, Any]:
+        # preloaded docs pin precise_convert to one process and bypass its iterdxf streaming:
+        # only a single file below the stream threshold is parsed here (and kept for the next
+        # action); several files go to the converter's process pool, big ones get streamed
+        from services.conversion_service import STREAM_THRESHOLD_MB
+        if len(files) == 1 and os.path.getsize(files[0]) < STREAM_THRESHOLD_MB * 1024 * 1024:
+            return self._get_docs(files)
+        return {}
+
+    def _stat_inputs(self, paths: List[str]) -> bool:
+        # one stat per picked file: catches unreadable picks up front and sizes the input
+        meta = {}
+        for p in paths:
+            try:
+                st = os.stat(p)
+            except OSError as ex:
+                QMessageBox.critical(self, "Error", f"Cannot read input file:\n{p}\n{ex}")
+                return False
+            meta[p] = (st.st_size, st.st_mtime_ns)
+        self._file_meta = meta
+        return True
 
     def _append_layers(self, layers: List[str]):
-        self.lstLayers.clear()
-        for name in layers:
-            it = QListWidgetItem(name)
-            it.setData(Qt.UserRole, name)
-            self.lstLayers.addItem(it)
+        # diff against the rows already listed: only stale rows go and only new names are inserted,
+        # so a re-analyze keeps unchanged items (and their selection) instead of rebuilding the list
+        lst = self.lstLayers
+        wanted = set(layers)
+        lst.setUpdatesEnabled(False)
+        try:
+            for row in range(lst.count() - 1, -1, -1):
+                name = lst.item(row).data(Qt.UserRole)
+                if name not in wanted:
+                    lst.takeItem(row)
+                    self._selected_layer_set.discard(name)  # row removal emits no selectionChanged
+            # the kept rows are a subsequence of `layers`: one forward pass finds the runs of new
+            # names between them, and each run goes in with a single insertItems call
+            kept = [lst.item(row).data(Qt.UserRole) for row in range(lst.count())]
+            row = k = 0
+            run: List[str] = []
+            for name in layers + [None]:  # None: end marker that flushes the last run
+                if name is not None and (k >= len(kept) or kept[k] != name):
+                    run.append(name)
+                    continue
+                if run:
+                    lst.insertItems(row, run)
+                    for i, new in enumerate(run, row):
+                        lst.item(i).setData(Qt.UserRole, new)
+                    row += len(run)
+                    run = []
+                row += 1
+                k += 1
+        finally:
+            lst.setUpdatesEnabled(True)
+
+    def _on_layer_selection_changed(self, selected, deselected):
+        for idx in deselected.indexes():
+            self._selected_layer_set.discard(idx.data(Qt.UserRole))
+        for idx in selected.indexes():
+            self._selected_layer_set.add(idx.data(Qt.UserRole))
+        if self._layer_bboxes and not self._busy:
+            self._zoom_timer.start()  # (re)start: only the final selection zooms
+
+    def _recompute_zoom(self):
+        # quiet variant of do_zoom_selection for selection changes: no message boxes
+        if not self._layer_bboxes:
+            return
+        bbox = compute_geojson_bbox_for_selection(self._layer_bboxes, self._selected_layers(),
+                                                  self._layer_bboxes, self._payload_index)
+        if bbox:
+            self.map.fit_bounds(bbox)
 
     def _selected_layers(self) -> Optional[List[str]]:
-        items = self.lstLayers.selectedItems()
-        if not items:
-            return None  # None => all
-        return [it.data(Qt.UserRole) for it in items]
+        return sorted(self._selected_layer_set) or None  # None => all
 
     # -------- UI events --------
     def on_select_all_layers(self):
@@ -314,15 +641,19 @@ class MainWindow(QMainWindow):
     def on_pick(self):
         if self._busy:
             return
-        path, _ = QFileDialog.getOpenFileName(
-            self, "Choose CAD file", "",
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Choose CAD file(s)", "",
             "CAD Files (*.dxf *.dwg);;DXF Files (*.dxf);;DWG Files (*.dwg)"
         )
-        if not path:
+        if not paths:
             return
+        self._clear_docs()  # new input: drop parsed docs of the previous one
+        # a 'Show in Map' is likely to follow: build the map now (once the dialog is gone) so the
+        # page and Leaflet load while Analyze runs, and the first show finds the page ready
+        QTimer.singleShot(0, self._ensure_map)
 
-        ext = os.path.splitext(path)[1].lower()
-        if ext == ".dwg":
+        dwgs = [p for p in paths if os.path.splitext(p)[1].lower() == ".dwg"]
+        if dwgs:
             if not self.chkEnableDWG.isChecked() or not self._dwg_converter:
                 QMessageBox.information(
                     self, "DWG disabled",
@@ -332,21 +663,27 @@ class MainWindow(QMainWindow):
                 )
                 return
 
-            # Background DWG → temp DXF conversion
+            # Background DWG → temp DXF conversion; all picked DWGs go to the converter
+            # as one batch (a single ODA run), so its startup is paid once
             self._set_busy(True)
             prefer = "auto"  # or 'oda' / 'libredwg'
             def task_fn():
-                return dwg_to_temp_dxf_auto(path, prefer=prefer, dxf_version="ACAD2013")
+                return dwgs_to_temp_dxfs_auto(dwgs, prefer=prefer, dxf_version="ACAD2013",
+                                              on_progress=self._log, timeout=DWG_TIMEOUT_S)
 
-            def _done(_th, temp_dxf):
+            def _done(_th, temp_dxfs):
                 self._set_busy(False)
-                if not temp_dxf or not os.path.isfile(temp_dxf):
+                if not temp_dxfs or not all(t and os.path.isfile(t) for t in temp_dxfs):
                     QMessageBox.critical(self, "Error", "DWG conversion failed (no DXF produced).")
                     return
-                self._temp_files.append(temp_dxf)
-                self._files = [temp_dxf]
-                self.inPath.setText(f"{path}  (via temp DXF)")
-                QMessageBox.information(self, "Info", "DWG converted to temporary DXF. You can Analyze / Show / Convert now.")
+                self._temp_files.extend(temp_dxfs)
+                via = dict(zip(dwgs, temp_dxfs))
+                files = [via.get(p, p) for p in paths]  # picked order, DWGs swapped for their DXF
+                if not self._stat_inputs(files):
+                    return
+                self._files = files
+                self.inPath.setText(f"{'; '.join(paths)}  (via temp DXF)")
+                self._status("DWG converted to temporary DXF. You can Analyze / Show / Convert now.")
 
             def _err(_th, msg):
                 self._set_busy(False)
@@ -356,9 +693,12 @@ class MainWindow(QMainWindow):
             return
 
         # default DXF path
-        self.inPath.setText(path)
-        self._files = [path]
-        QMessageBox.information(self, "Info", f"Input: {path}")
+        if not self._stat_inputs(paths):
+            return
+        self.inPath.setText("; ".join(paths))
+        self._files = list(paths)
+        total = sum(size for size, _ in self._file_meta.values())
+        self._status(f"Input: {'; '.join(paths)} ({_fmt_size(total)})")
 
     def on_pick_out(self):
         if self._busy:
@@ -367,7 +707,7 @@ class MainWindow(QMainWindow):
         if not d:
             return
         self.outPath.setText(d)
-        QMessageBox.information(self, "Info", f"Output: {d}")
+        self._status(f"Output: {d}")
 
     # -------- Actions --------
     def do_analyze(self):
@@ -382,20 +722,28 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Error", f"Input file not found:\n{dxf_path}")
             return
 
+        rescan = bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)  # Shift+click: bypass the cache
         self._set_busy(True)
         t0 = time.perf_counter()
+        for p in self._files:
+            size = self._file_meta.get(p, (0, 0))[0]
+            if size > LARGE_INPUT_BYTES:
+                self._log(f"Large input ({_fmt_size(size)}): {os.path.basename(p)}, this may take a while…")
 
         def task_fn():
-            return fast_scan_layers(self._files)
+            # docs already parsed by Show/Convert are reused; every other file is tag-scanned
+            # without building a document (Show/Convert parse it when they need it)
+            docs = {p: d for p in self._files if (d := self._peek_doc(p)) is not None}
+            return fast_scan_layers(self._files, docs, rescan=rescan)
 
         def _done(_th, layers: List[str]):
             dt = time.perf_counter() - t0
             self._set_busy(False)
             if not layers:
-                QMessageBox.information(self, "Done", "No layers found.")
+                self._status("No layers found.")
                 return
             self._append_layers(layers)
-            QMessageBox.information(self, "Done", f"Found {len(layers)} layers. (time {dt:.2f}s)")
+            self._status(f"Found {len(layers)} layers. (time {dt:.2f}s)")
 
         def _err(_th, msg: str):
             self._set_busy(False)
@@ -403,6 +751,50 @@ class MainWindow(QMainWindow):
 
         self._run_in_thread(task_fn, _done, _err)
 
+    def _collect_params(self, outp: str = "") -> ConvertParams:
+        try:
+            src = int(self.srcEpsg.text().strip() or "3826")
+        except Exception:
+            src = 3826
+        try:
+            tgt = int(self.tgtEpsg.text().strip()) if self.tgtEpsg.text().strip() else None
+        except Exception:
+            tgt = None
+        layers = self._selected_layers()
+        return ConvertParams(
+            source_epsg=src,
+            target_epsg=tgt,
+            block_mode="keep-merge" if self.chkKeepBlocks.isChecked() else "explode",
+            line_merge_tol=float(self.spinMergeTol.value()),
+            target_layers=tuple(layers) if layers else None,
+            driver="GPKG" if (self.cmbDriver.currentText() == "GPKG" or outp.lower().endswith(".gpkg")) else "ESRI Shapefile",
+            overwrite=self.chkOverwrite.isChecked(),
+        )
+
+    def _run_convert(self, params: ConvertParams, files: Tuple[str, ...], outp: str):
+        # worker side of do_convert: reads nothing from the widgets
+        from services.conversion_service import precise_convert, write_outputs
+        buckets = precise_convert(
+            list(files),
+            source_epsg=params.source_epsg,
+            target_epsg=params.target_epsg,
+            include_3d=False,
+            bbox_wgs84=None,
+            target_layers=list(params.target_layers) if params.target_layers else None,
+            block_mode=params.block_mode,
+            line_merge_tol=params.line_merge_tol,
+            fallback_explode_lines=True,
+            on_progress=self._log,
+            preloaded_docs=self._docs_for_run(files),
+        )
+        return write_outputs(
+            buckets,
+            out_path=outp,
+            driver=params.driver,
+            overwrite=params.overwrite,
+            on_progress=self._log,
+        )
+
     def do_show_in_map(self):
         if self._busy:
             return
@@ -410,64 +802,59 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Notice", "Please choose a DXF/DWG file first.")
             return
 
-        try:
-            src = int(self.srcEpsg.text().strip() or "3826")
-        except Exception:
-            src = 3826
+        if self._ensure_map() is None:  # before going busy: a failure must not leave the UI locked
+            QMessageBox.warning(self, "Map unavailable", self._map_error or "")
+            return
 
-        target_layers = self._selected_layers()  # None => all
-        keep_blocks = self.chkKeepBlocks.isChecked()
-        mode = "keep-merge" if keep_blocks else "explode"
+        params = self._collect_params()
+        src = params.source_epsg
+        files = tuple(self._files)
 
         self._set_busy(True)
 
         def task_fn():
+            from services.conversion_service import precise_convert
             buckets = precise_convert(
-                self._files,
+                list(files),
                 source_epsg=src,
-                target_epsg=4326,      # web map
+                target_epsg=None,      # keep source CRS; only the kept preview subset is reprojected below
                 include_3d=False,
                 bbox_wgs84=None,
-                target_layers=target_layers,
-                block_mode=mode,
+                target_layers=list(params.target_layers) if params.target_layers else None,
+                block_mode=params.block_mode,
                 line_merge_tol=0.5,    # lighter for preview
                 fallback_explode_lines=True,
-                on_progress=None,
+                on_progress=self._log,
+                preloaded_docs=self._docs_for_run(files),
             )
-            result: Dict[str, dict] = {}
-            MAX_FEAT = 20000
-            for (layer, geom), gdf in buckets.items():
-                if gdf.empty:
-                    continue
-                if len(gdf) > MAX_FEAT:
-                    gdf = gdf.iloc[:MAX_FEAT].copy()
-                try:
-                    if str(getattr(gdf, "crs", None)).upper() not in ("EPSG:4326",):
-                        gdf = gdf.to_crs(4326)
-                except Exception:
-                    pass
-                try:
-                    gj_obj = json.loads(gdf.to_json(drop_id=True))
-                except Exception:
-                    continue
-                key = f"{layer} ({geom})"
-                result[key] = gj_obj
-            # compute bbox in WGS84 for auto-zoom
-            bbox = compute_geojson_dict_bbox(result)  # (south, west, north, east) or None
-            return {"layers": result, "bbox": bbox}
+            bbox = None
+            n_layers = 0
+            if not buckets:
+                return {"count": 0, "bbox": None}
+            with ThreadPoolExecutor(max_workers=min(8, len(buckets))) as ex:
+                # map() keeps bucket order while later buckets are already converting
+                # source already WGS84: no per-bucket CRS lookup or transform at all
+                for res in ex.map(partial(_bucket_to_geojson, reproject=src != 4326), buckets.items()):
+                    if res is None:
+                        continue
+                    key, lb, gj_json = res
+                    bbox = _merge_bbox(bbox, lb)
+                    n_layers += 1
+                    yield key, lb, gj_json  # shown as soon as it is ready
+            return {"count": n_layers, "bbox": bbox}
+
+        def _layer(item):
+            key, lb, gj_json = item
+            self._layer_bboxes[key] = lb  # store for "Zoom to selection"
+            self._payload_index.setdefault(key.split(" (", 1)[0], []).append(key)
+            self.map.add_geojson_layer(key, gj_json)  # already JSON text
 
         def _done(_th, payload: Dict[str, Any]):
             self._set_busy(False)
-            if not payload or not isinstance(payload, dict):
-                QMessageBox.information(self, "Map", "No features to show.")
+            if not payload or not payload.get("count"):
+                self._status("No features to show.")
                 return
-            layers = payload.get("layers") or {}
             bbox = payload.get("bbox")
-            if not layers:
-                QMessageBox.information(self, "Map", "No features to show.")
-                return
-            self._last_map_payload = layers  # store for "Zoom to selection"
-            self.map.show_geojson(layers)
             if bbox:
                 self.map.fit_bounds(tuple(bbox))  # (south, west, north, east)
 
@@ -475,19 +862,24 @@ class MainWindow(QMainWindow):
             self._set_busy(False)
             QMessageBox.critical(self, "Error", msg)
 
-        self._run_in_thread(task_fn, _done, _err)
+        self._layer_bboxes = {}
+        self._payload_index = {}
+        self.map.clear_layers()
+        self._run_in_thread(task_fn, _done, _err, _layer)
 
     def do_zoom_selection(self):
         """Zoom only to selected layers (using already shown payload)."""
-        if not self._last_map_payload:
-            QMessageBox.information(self, "Zoom", "Map has no layers yet. Use 'Show in Map' first.")
+        self._zoom_timer.stop()
+        if not self._layer_bboxes:
+            self._status("Map has no layers yet. Use 'Show in Map' first.")
             return
         selected = self._selected_layers()
-        bbox = compute_geojson_bbox_for_selection(self._last_map_payload, selected)
+        bbox = compute_geojson_bbox_for_selection(self._layer_bboxes, selected,
+                                                  self._layer_bboxes, self._payload_index)
         if bbox:
             self.map.fit_bounds(bbox)
         else:
-            QMessageBox.information(self, "Zoom", "No geometry found for the current selection.")
+            self._status("No geometry found for the current selection.")
 
     def do_convert(self):
         if self._busy:
@@ -511,56 +903,21 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Error", f"Cannot create output folder:\n{outp}\n{ex}")
             return
 
-        drv = "GPKG" if (self.cmbDriver.currentText() == "GPKG" or outp.lower().endswith(".gpkg")) else "ESRI Shapefile"
-
-        try:
-            src = int(self.srcEpsg.text().strip() or "3826")
-        except Exception:
-            src = 3826
-        try:
-            tgt = int(self.tgtEpsg.text().strip()) if self.tgtEpsg.text().strip() else None
-        except Exception:
-            tgt = None
-
-        target_layers = self._selected_layers()
-        keep_blocks = self.chkKeepBlocks.isChecked()
-        mode = "keep-merge" if keep_blocks else "explode"
-        merge_tol = float(self.spinMergeTol.value())
+        params = self._collect_params(outp)
 
         self._set_busy(True)
         t0 = time.perf_counter()
-
-        def task_fn():
-            buckets = precise_convert(
-                self._files,
-                source_epsg=src,
-                target_epsg=tgt,
-                include_3d=False,
-                bbox_wgs84=None,
-                target_layers=target_layers,
-                block_mode=mode,
-                line_merge_tol=merge_tol,
-                fallback_explode_lines=True,
-                on_progress=None,
-            )
-            written = write_outputs(
-                buckets,
-                out_path=outp,
-                driver=drv,
-                overwrite=self.chkOverwrite.isChecked(),
-                on_progress=None,
-            )
-            return written
+        task_fn = partial(self._run_convert, params, tuple(self._files), outp)
 
         def _done(_th, written):
             self._set_busy(False)
             dt = time.perf_counter() - t0
             if not written:
-                QMessageBox.information(self, "Done", "No files were written.")
+                self._status("No files were written.")
                 return
-            lines = [f"- {w['layer']} ({w['count']}) → {w['path']}" for w in written]
-            summary = "\n".join(lines)
-            QMessageBox.information(self, "Done", f"Successfully wrote {len(written)} layer(s) in {dt:.2f}s.\n\n{summary}")
+            self._status(f"Successfully wrote {len(written)} layer(s) to {outp} in {dt:.2f}s.")
+            self.logView.appendPlainText("\n".join(
+                f"- {w['layer']} ({w['count']}) → {w['path']}" for w in written))
 
         def _err(_th, msg: str):
             self._set_busy(False)
@@ -569,6 +926,7 @@ class MainWindow(QMainWindow):
         self._run_in_thread(task_fn, _done, _err)
 
     def closeEvent(self, event):
+        self._clear_docs()  # parsed docs can be large; don't hold them through shutdown
         # cleanup temp DXFs created from DWG
         for p in list(self._temp_files):
             try:
@@ -583,15 +941,11 @@ class MainWindow(QMainWindow):
                 pass
         self._temp_files.clear()
 
-        # ensure no threads leak
-        for th in list(self._threads):
-            try:
-                if th.isRunning():
-                    th.quit()
-                    th.wait(2000)
-            except Exception:
-                pass
-        self._threads.clear()
+        # drop queued actions; a running one finishes on its own thread
+        try:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
 
         super().closeEvent(event)
 
@@ -1,11 +1,26 @@
 # dxf2gis_gui/ui/map_view.py
 from __future__ import annotations
 import json
+from functools import lru_cache
 from typing import Dict, Any, Tuple, Optional, List
 
-from PySide6.QtCore import QUrl
+# orjson is optional: faster encoding of GeoJSON handed over as dicts; stdlib json otherwise
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+from PySide6.QtCore import Qt, QUrl, QObject, QFile, QIODevice, QByteArray, QTimer, Signal, Slot
 from PySide6.QtWebEngineWidgets import QWebEngineView
 
+# QtWebChannel is optional: without it layers are sent to the page with runJavaScript
+try:
+    from PySide6.QtWebChannel import QWebChannel
+except Exception:
+    QWebChannel = None
+
+SHOW_DEBOUNCE_MS = 150  # show_geojson calls closer together than this render only the last payload
+
 
 _LEAFLET_HTML_TMPL = """<!doctype html>
 <html>
@@ -23,6 +38,7 @@ html, body, #map { width:100%; height:100%; margin:0; padding:0; }
 <div id="map"></div>
 
 <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<!--QWEBCHANNEL_JS-->
 <script>
 // Initialize map
 const map = L.map('map', { preferCanvas: true }).setView([23.7, 121.0], 6);
@@ -69,15 +85,40 @@ function addGeoJson(name, gj, colorIdx) {
   return layer;
 }
 
+// Incremental layers: clear once, then add one FeatureCollection at a time.
+// Each queued layer is built in its own animation frame, so the map repaints between big layers.
+let _layerCount = 0;
+let _queue = [];
+let _scheduled = false;
+function scheduleDrain() {
+  if (_scheduled) return;
+  _scheduled = true;
+  // a hidden page gets no animation frames: use a plain task so layers still arrive
+  if (document.hidden) setTimeout(drainQueue, 0);
+  else requestAnimationFrame(drainQueue);
+}
+function drainQueue() {
+  _scheduled = false;
+  const item = _queue.shift();
+  if (!item) return;
+  try { addGeoJson(item[0], item[1], _layerCount++); }
+  catch(e) { console.error('Failed to add layer', item[0], e); }
+  if (_queue.length) scheduleDrain();
+}
+window.clearGeoJsonLayers = function() {
+  _queue = [];  // a drain already scheduled finds nothing left to add
+  clearLayers();
+  _layerCount = 0;
+};
+window.addGeoJsonLayer = function(name, gj) {
+  _queue.push([name, gj]);
+  scheduleDrain();
+};
+
 // Set layers from payload: { "Layer (GEOM)": FeatureCollection, ... }
 window.setGeoJsonLayers = function(payload) {
-  clearLayers();
-  const names = Object.keys(payload || {});
-  names.sort();
-  names.forEach((name, idx) => {
-    try { addGeoJson(name, payload[name], idx); }
-    catch(e) { console.error('Failed to add layer', name, e); }
-  });
+  window.clearGeoJsonLayers();
+  Object.keys(payload || {}).sort().forEach(name => window.addGeoJsonLayer(name, payload[name]));
 };
 
 window.fitToBounds = function(swLat, swLng, neLat, neLng) {
@@ -86,42 +127,127 @@ window.fitToBounds = function(swLat, swLng, neLat, neLng) {
     if (b.isValid()) map.fitBounds(b, {padding:[20,20]});
   } catch(e) { console.error('fitToBounds error', e); }
 };
+
+// Layers pushed from Python over the web channel arrive as JSON text (JSON.parse, not JS source)
+if (typeof QWebChannel !== 'undefined' && window.qt && qt.webChannelTransport) {
+  new QWebChannel(qt.webChannelTransport, function(ch) {
+    const bridge = ch.objects.bridge;
+    bridge.layersCleared.connect(function() { window.clearGeoJsonLayers(); });
+    bridge.layerAdded.connect(function(name, text) { window.addGeoJsonLayer(name, JSON.parse(text)); });
+    bridge.layersSet.connect(function(text) { window.setGeoJsonLayers(JSON.parse(text)); });
+    bridge.ready();  // anything sent before this point was queued on the Python side
+  });
+}
 </script>
 </body>
 </html>
 """
 
+
+@lru_cache(maxsize=None)
+def _read_qwebchannel_js() -> str:
+    # qwebchannel.js ships inside the QtWebChannel library as a Qt resource; it is inlined into
+    # the page because the page's https origin may not load qrc: scripts
+    if QWebChannel is None:
+        return ""
+    f = QFile(":/qtwebchannel/qwebchannel.js")
+    if not f.open(QIODevice.ReadOnly):
+        return ""
+    try:
+        return bytes(f.readAll()).decode("utf-8")
+    finally:
+        f.close()
+
+
+@lru_cache(maxsize=None)
+def _page_html(with_channel: bool) -> QByteArray:
+    # the page is static: built and UTF-8 encoded once, then handed to setContent as-is
+    channel = f"<script>{_read_qwebchannel_js()}</script>" if with_channel else ""
+    return QByteArray(_LEAFLET_HTML_TMPL.replace("<!--QWEBCHANNEL_JS-->", channel).encode("utf-8"))
+
+
+class _MapBridge(QObject):
+    """Object published to the page; its signals are connected to the Leaflet helpers in JS."""
+    layersCleared = Signal()
+    layerAdded = Signal(str, str)  # name, FeatureCollection JSON text
+    layersSet = Signal(str)        # {name: FeatureCollection} JSON text
+    pageReady = Signal()
+
+    @Slot()
+    def ready(self):
+        self.pageReady.emit()
+
+
 class MapView(QWebEngineView):
     """
     Leaflet-based preview in a QWebEngineView.
     expose:
       - load_empty()
-      - show_geojson(dict[str -> GeoJSON])
+      - show_geojson(dict[str -> GeoJSON])                   (debounced, sent layer by layer)
+      - clear_layers() / add_geojson_layer(name, GeoJSON)   (incremental)
+    GeoJSON arguments may also be pre-encoded JSON text (str/bytes), which is passed
+    to the page as-is so big payloads can be serialized off the UI thread.
       - fit_bounds((south, west, north, east))
+    With QtWebChannel available, layer payloads go over a web channel instead of being
+    pasted into runJavaScript source.
     """
+    _jsQueued = Signal(str)  # script handed to the GUI thread (see _run_js)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self._ready: bool = False
-        self._pending_js: List[str] = []
+        self._pending_js: List[str] = []  # scripts waiting for loadFinished; GUI thread only
         self.loadFinished.connect(self._on_loaded)
+        self._jsQueued.connect(self._exec_js, Qt.QueuedConnection)
+        self._use_channel = bool(_read_qwebchannel_js())
+        self._bridge: Optional[_MapBridge] = None
+        self._bridge_ready: bool = False
+        self._pending_bridge: List[Tuple[str, tuple]] = []  # (signal name, args) until the page connects
+        if self._use_channel:
+            self._bridge = _MapBridge(self)
+            self._bridge.pageReady.connect(self._on_bridge_ready)
+            self._channel = QWebChannel(self)
+            self._channel.registerObject("bridge", self._bridge)
+            self.page().setWebChannel(self._channel)
+        # show_geojson replaces every layer, so in a burst of calls only the last one matters
+        self._pending_show: Optional[Tuple[Any]] = None
+        self._show_timer = QTimer(self)
+        self._show_timer.setSingleShot(True)
+        self._show_timer.setInterval(SHOW_DEBOUNCE_MS)
+        self._show_timer.timeout.connect(self._flush_show)
 
     def _on_loaded(self, ok: bool):
         self._ready = bool(ok)
-        if self._ready and self._pending_js:
-            for code in self._pending_js:
-                try:
-                    self.page().runJavaScript(code)
-                except Exception:
-                    pass
-            self._pending_js.clear()
+        if not self._ready:
+            return
+        pending, self._pending_js = self._pending_js, []
+        for code in pending:
+            try:
+                self.page().runJavaScript(code)
+            except Exception:
+                pass
+
+    def _on_bridge_ready(self):
+        self._bridge_ready = True
+        pending, self._pending_bridge = self._pending_bridge, []
+        for name, args in pending:
+            getattr(self._bridge, name).emit(*args)
 
     def load_empty(self):
-        # Use setHtml to avoid local file issues and SRI restrictions
+        # Inline content (not a file URL) avoids local file issues and SRI restrictions
         self._ready = False
+        self._bridge_ready = False
         # baseUrl helps Leaflet fetch relative assets if any (we use CDN anyway)
-        self.setHtml(_LEAFLET_HTML_TMPL, baseUrl=QUrl("https://unpkg.com/"))
+        self.setContent(_page_html(self._use_channel), "text/html;charset=UTF-8",
+                        QUrl("https://unpkg.com/"))
 
     def _run_js(self, code: str):
+        # always goes through the queued signal: the ready check, the pending list and
+        # runJavaScript all happen on the GUI thread, in call order, whoever the caller is
+        self._jsQueued.emit(code)
+
+    @Slot(str)
+    def _exec_js(self, code: str):
         try:
             if self._ready and self.page():
                 self.page().runJavaScript(code)
@@ -133,12 +259,68 @@ class MapView(QWebEngineView):
         except Exception:
             pass
 
-    def show_geojson(self, layers: Dict[str, Any]):
+    @staticmethod
+    def _as_json(obj: Any) -> str:
+        # pre-encoded text passes through untouched; anything else is encoded exactly once
+        if isinstance(obj, bytes):
+            return obj.decode("utf-8")
+        if isinstance(obj, str):
+            return obj
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def _emit(self, signal: str, *args):
+        # channel calls keep their order among themselves; they wait for the page's ready() call
+        if self._bridge_ready:
+            getattr(self._bridge, signal).emit(*args)
+        else:
+            self._pending_bridge.append((signal, args))
+
+    def show_geojson(self, layers: Any):
+        # encoded and sent once the calls stop for SHOW_DEBOUNCE_MS (or before the next
+        # clear/add, which keeps the call order); don't mutate `layers` until then
+        self._pending_show = (layers,)
+        self._show_timer.start()
+
+    def _flush_show(self):
+        self._show_timer.stop()
+        if self._pending_show is None:
+            return
+        (layers,), self._pending_show = self._pending_show, None
+        if isinstance(layers, dict):
+            # one layer per call: only a single layer's JSON exists at a time, never the whole payload
+            self.clear_layers()
+            for name in sorted(layers):
+                self.add_geojson_layer(name, layers[name])
+            return
         if self.url().isEmpty():
             self.load_empty()
-        payload = json.dumps(layers, ensure_ascii=False)
+        payload = self._as_json(layers)
+        if self._bridge is not None:
+            self._emit("layersSet", payload)
+            return
         self._run_js(f"window.setGeoJsonLayers({payload});")
 
+    def clear_layers(self):
+        self._flush_show()
+        if self.url().isEmpty():
+            self.load_empty()
+        if self._bridge is not None:
+            self._emit("layersCleared")
+            return
+        self._run_js("window.clearGeoJsonLayers();")
+
+    def add_geojson_layer(self, name: str, gj: Any):
+        self._flush_show()
+        if self.url().isEmpty():
+            self.load_empty()
+        payload = self._as_json(gj)
+        if self._bridge is not None:
+            self._emit("layerAdded", name, payload)
+            return
+        self._run_js(f"window.addGeoJsonLayer({json.dumps(name, ensure_ascii=False)}, {payload});")
+
     def fit_bounds(self, bounds: Tuple[float, float, float, float]):
         if not bounds:
             return